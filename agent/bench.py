@@ -0,0 +1,240 @@
+# COMP30024 Artificial Intelligence, Semester 1 2025
+# Project Part B: Game Playing Agent
+
+# Benchmark the agent's search on a fixed suite of positions. For example, to
+# compare full-width and selective search at a budget of 20000 nodes per
+# position:
+#
+#   python -m agent.bench --nodes 20000
+#
+# Positions are scored with the evaluation the agent plays with (its saved
+# weights, or the default; see evaluation.py), so the depths and times carry
+# over to the agent.
+#
+# Individual selective techniques can be switched off to measure their effect
+# (run with --help for the full list of options). With --startup N, the
+# agent's startup (import and construction) is measured instead, in N fresh
+# interpreters.
+
+import argparse
+import subprocess
+import sys
+import time
+from dataclasses import replace
+
+from referee.game import PlayerColor, Coord
+
+from .evaluation import Evaluator, EvaluationCache
+from .patterns import PatternDatabase
+from .program import GameStateNode
+from .search import PrincipalVariationSearch, SearchOptions
+from .tt import TranspositionTable
+
+# Positions taken from self-play games, one string per row (R: red frog, B:
+# blue frog, *: lily pad, .: empty), each with the player to move.
+POSITION_SUITE = [
+    (PlayerColor.RED, [
+        "**RRRRR*",
+        "*R******",
+        "***.....",
+        "........",
+        "........",
+        "...***..",
+        "****B***",
+        "*BBB*BB*",
+    ]),
+    (PlayerColor.RED, [
+        "**..R.R*",
+        "*R*R*R**",
+        "*R*.....",
+        "........",
+        "........",
+        "...*B*..",
+        "*BB*B***",
+        "*..B*B.*",
+    ]),
+    (PlayerColor.BLUE, [
+        "**.....*",
+        "*.*R*RR*",
+        "RRR.....",
+        "........",
+        "........",
+        "...BBB..",
+        "*B.*BB**",
+        "*...*..*",
+    ]),
+    (PlayerColor.RED, [
+        "********",
+        "*B*R*R.*",
+        "R.R*****",
+        "*RR*....",
+        "..*B***.",
+        "***.BB*.",
+        "*B**B.**",
+        "********",
+    ]),
+    (PlayerColor.BLUE, [
+        "*B******",
+        "*.*.*R.*",
+        "R..R****",
+        "*.R*....",
+        "..RBB**.",
+        "B**.BB*.",
+        "*.**..R*",
+        "********",
+    ]),
+    (PlayerColor.RED, [
+        "*B******",
+        "***.*..*",
+        "R...*R**",
+        "*.R.B*..",
+        "**RBBB*.",
+        "B**R..*.",
+        "******R*",
+        "********",
+    ]),
+    (PlayerColor.BLUE, [
+        "*B******",
+        "***.*..*",
+        "....*RB*",
+        "R.R.BB..",
+        "B*RB..*.",
+        ".**...*.",
+        "***R**.*",
+        "******R*",
+    ]),
+    (PlayerColor.RED, [
+        "*B**B***",
+        "***....*",
+        ".....RB*",
+        ".....B..",
+        "BR.B..*.",
+        ".R*...*.",
+        "***R**.*",
+        "****R*R*",
+    ]),
+]
+
+
+def parse_position(color: PlayerColor, rows: list[str]) -> GameStateNode:
+    """
+    Build a root search node from a position in the suite's text format.
+    """
+    red_frogs, blue_frogs, lily_pads = set(), set(), set()
+    for r, row in enumerate(rows):
+        for c, cell in enumerate(row):
+            coord = Coord(r, c)
+            if cell != ".":
+                lily_pads.add(coord)
+            if cell == "R":
+                red_frogs.add(coord)
+            elif cell == "B":
+                blue_frogs.add(coord)
+    return GameStateNode(red_frogs, blue_frogs, lily_pads,
+                         isMax=True, color=color)
+
+
+def run_suite(options: SearchOptions, max_depth: int, max_nodes: int,
+              use_tt: bool = True, evaluator: Evaluator | None = None):
+    """
+    Search every position in the suite (each with a fresh transposition
+    table, if used, and evaluation cache), returning (depth, nodes, seconds,
+    best action) for each. Positions are scored with `evaluator`, by default
+    the one the agent plays with.
+    """
+    if evaluator is None:
+        evaluator = Evaluator.load(PatternDatabase.open())
+    results = []
+    for color, rows in POSITION_SUITE:
+        tt = TranspositionTable(entries=1 << 16) if use_tt else None
+        search = PrincipalVariationSearch(options, tt=tt, evaluator=evaluator,
+                                          eval_cache=EvaluationCache())
+        root = parse_position(color, rows)
+        start = time.process_time()
+        _, best = search.search(root, max_depth, max_nodes)
+        elapsed = time.process_time() - start
+        results.append((search.depth, search.nodes, elapsed, best))
+    return results
+
+
+# Measures the agent's startup in a fresh interpreter which, like the
+# referee's agent subprocess, has loaded the referee (and numpy, if
+# installed) before its timer starts
+_STARTUP_SCRIPT = """
+import time
+from importlib.util import find_spec
+import referee.agent.subprocess
+from referee.game import PlayerColor
+if find_spec("numpy") is not None:
+    import numpy
+start = time.process_time()
+from agent import Agent
+imported = time.process_time()
+Agent(PlayerColor.RED)
+print(imported - start, time.process_time() - imported)
+"""
+
+
+def startup_times(runs: int) -> list[tuple[float, float]]:
+    """
+    The CPU time taken to import the agent package and to construct an
+    agent, in each of `runs` fresh interpreters.
+    """
+    results = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", _STARTUP_SCRIPT],
+                                capture_output=True, text=True, check=True)
+        import_time, init_time = map(float, output.stdout.split())
+        results.append((import_time, init_time))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="agent.bench",
+        description="Benchmark the agent's search on a fixed position suite.",
+    )
+    parser.add_argument("--nodes", type=int, default=20000,
+        help="node budget per position (default: %(default)s)")
+    parser.add_argument("--depth", type=int, default=16,
+        help="maximum iterative deepening depth (default: %(default)s)")
+    parser.add_argument("--no-tt", action="store_true")
+    parser.add_argument("--no-quiescence", action="store_true")
+    parser.add_argument("--no-null-move", action="store_true")
+    parser.add_argument("--no-lmr", action="store_true")
+    parser.add_argument("--no-futility", action="store_true")
+    parser.add_argument("--startup", type=int, metavar="N",
+        help="measure the agent's startup CPU time over N runs instead")
+    args = parser.parse_args()
+
+    if args.startup:
+        results = startup_times(args.startup)
+        for name, times in zip(("import", "constructor"), zip(*results)):
+            print(f"{name:12} mean {1000 * sum(times) / len(times):6.1f}ms"
+                  f"  min {1000 * min(times):6.1f}ms")
+        return
+
+    selective = replace(SearchOptions(),
+        quiescence=not args.no_quiescence,
+        null_move=not args.no_null_move,
+        lmr=not args.no_lmr,
+        futility=not args.no_futility,
+    )
+    full_width = replace(selective,
+        null_move=False, lmr=False, futility=False)
+
+    evaluator = Evaluator.load(PatternDatabase.open())
+    for name, options in [("full-width", full_width), ("selective", selective)]:
+        results = run_suite(options, args.depth, args.nodes, not args.no_tt,
+                            evaluator)
+        print(f"{name}:")
+        for i, (depth, nodes, elapsed, best) in enumerate(results):
+            print(f"  #{i}  depth {depth:2d}  nodes {nodes:7d}  "
+                  f"{elapsed:6.2f}s  best {best}")
+        mean_depth = sum(r[0] for r in results) / len(results)
+        total_time = sum(r[2] for r in results)
+        print(f"  mean depth {mean_depth:.2f}, total {total_time:.2f}s\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+# COMP30024 Artificial Intelligence, Semester 1 2025
+# Project Part B: Game Playing Agent
+
+from referee.game import PlayerColor, Coord, Direction, \
+    Action, MoveAction, GrowAction
+from referee.game.constants import BOARD_N
+
+from .tables import TABLES, SIDE_DIRECTIONS, NO_SQUARE
+from .tt import pack_move, move_squares, with_path, GROW_MOVE, DIRECTIONS, \
+    PATH_BITS
+
+# Positions are represented as three 64-bit masks (red frogs, blue frogs and
+# lily pads), with bit `r * BOARD_N + c` standing for the cell (r, c). A lily
+# pad bit is cleared when a frog lands on it, so the three masks are disjoint.
+# Sides are indexed 0 (red) and 1 (blue).
+
+RED = 0
+BLUE = 1
+
+FULL_MASK = (1 << BOARD_N * BOARD_N) - 1
+_ROW_0 = (1 << BOARD_N) - 1
+ROW_MASKS = [_ROW_0 << r * BOARD_N for r in range(BOARD_N)]
+GOAL_MASKS = [ROW_MASKS[BOARD_N - 1], ROW_MASKS[0]]
+_NOT_FIRST_COL = FULL_MASK & ~sum(1 << r * BOARD_N for r in range(BOARD_N))
+_NOT_LAST_COL = FULL_MASK & ~sum(
+    1 << r * BOARD_N + BOARD_N - 1 for r in range(BOARD_N))
+
+
+def _offset(sq: int, direction: Direction, n: int = 1) -> int | None:
+    r = sq // BOARD_N + direction.value.r * n
+    c = sq % BOARD_N + direction.value.c * n
+    if 0 <= r < BOARD_N and 0 <= c < BOARD_N:
+        return r * BOARD_N + c
+    return None
+
+
+# Per side and square: destination squares of a step, and (jumped-over,
+# destination) square pairs of a single hop (read from the precomputed
+# tables; see tables.py)
+_STEPS = [
+    [tuple(dest for dest in TABLES.destinations(TABLES.steps, side, sq)
+           if dest != NO_SQUARE)
+     for sq in range(BOARD_N * BOARD_N)]
+    for side in (RED, BLUE)
+]
+_HOPS = [
+    [tuple((over, dest) for over, dest in
+           zip(TABLES.destinations(TABLES.steps, side, sq),
+               TABLES.destinations(TABLES.hops, side, sq))
+           if dest != NO_SQUARE)
+     for sq in range(BOARD_N * BOARD_N)]
+    for side in (RED, BLUE)
+]
+
+
+# The same, with the path code of each step or hop's direction (see tt.py),
+# as (code, destination) and (code, jumped-over, destination) triples
+_CODES = [[DIRECTIONS.index(direction) + 1 for direction in directions]
+          for directions in SIDE_DIRECTIONS]
+_CODED_STEPS = [
+    [tuple((code, dest) for code, dest in
+           zip(_CODES[side], TABLES.destinations(TABLES.steps, side, sq))
+           if dest != NO_SQUARE)
+     for sq in range(BOARD_N * BOARD_N)]
+    for side in (RED, BLUE)
+]
+_CODED_HOPS = [
+    [tuple((code, over, dest) for code, over, dest in
+           zip(_CODES[side], TABLES.destinations(TABLES.steps, side, sq),
+               TABLES.destinations(TABLES.hops, side, sq))
+           if dest != NO_SQUARE)
+     for sq in range(BOARD_N * BOARD_N)]
+    for side in (RED, BLUE)
+]
+
+
+# Per side and square: (jumped-over, destination) pairs of forward hops
+_FORWARD_HOPS = [
+    [tuple((over, dest) for over, dest in side_hops[sq]
+           if dest // BOARD_N != sq // BOARD_N)
+     for sq in range(BOARD_N * BOARD_N)]
+    for side_hops in _HOPS
+]
+
+
+def side_index(color: PlayerColor) -> int:
+    return RED if color == PlayerColor.RED else BLUE
+
+
+def from_sets(red_frogs, blue_frogs, lily_pads) -> tuple[int, int, int]:
+    """
+    The (red, blue, lily) masks of a position given as sets of coordinates.
+    """
+    red = _mask(red_frogs)
+    blue = _mask(blue_frogs)
+    return red, blue, _mask(lily_pads) & ~(red | blue)
+
+
+def _mask(coords) -> int:
+    return sum([1 << coord.r * BOARD_N + coord.c for coord in coords])
+
+
+# The starting position: each side's frogs on its home row, with lily pads in
+# the corners and in front of the frogs
+START_POSITION = from_sets(
+    {Coord(0, c) for c in range(1, BOARD_N - 1)},
+    {Coord(BOARD_N - 1, c) for c in range(1, BOARD_N - 1)},
+    {Coord(r, c) for r in (0, BOARD_N - 1) for c in (0, BOARD_N - 1)}
+    | {Coord(r, c) for r in (1, BOARD_N - 2) for c in range(1, BOARD_N - 1)})
+
+
+def neighbours(mask: int) -> int:
+    """
+    All cells adjacent (in any of the eight directions) to a cell in `mask`,
+    including the cells of `mask` themselves.
+    """
+    row = mask | (mask << 1 & _NOT_FIRST_COL) | (mask >> 1 & _NOT_LAST_COL)
+    return (row | row << BOARD_N | row >> BOARD_N) & FULL_MASK
+
+
+def goal_count(red: int, blue: int, side: int) -> int:
+    """
+    The number of the given side's frogs on its goal row (its score).
+    """
+    return ((red, blue)[side] & GOAL_MASKS[side]).bit_count()
+
+
+def progress(red: int, blue: int) -> tuple[int, int]:
+    """
+    The total number of rows advanced by each side's frogs.
+    """
+    red_rows = blue_rows = 0
+    for r, row in enumerate(ROW_MASKS):
+        red_rows += r * (red & row).bit_count()
+        blue_rows += (BOARD_N - 1 - r) * (blue & row).bit_count()
+    return red_rows, blue_rows
+
+
+def moves(red: int, blue: int, lily: int, side: int) -> list[int]:
+    """
+    The legal moves (packed, see `tt.pack_move`) of the given side. A jump
+    sequence is listed once per distinct landing square, and may stop after
+    any hop. A grow is listed last, unless it would add no lily pads (a
+    pass) and there are other moves.
+    """
+    own = red if side == RED else blue
+    occupied = red | blue
+    steps = _STEPS[side]
+    hops = _HOPS[side]
+    result = []
+    frogs = own
+    while frogs:
+        bit = frogs & -frogs
+        frogs ^= bit
+        start = bit.bit_length() - 1
+
+        for dest in steps[start]:
+            if lily >> dest & 1:
+                result.append(pack_move(start, dest))
+
+        # The jumping frog has left its start cell, so cannot hop over it
+        jumpable = occupied ^ bit
+        reached = bit
+        stack = [start]
+        while stack:
+            current = stack.pop()
+            for over, dest in hops[current]:
+                if jumpable >> over & 1 and lily >> dest & 1 \
+                        and not reached >> dest & 1:
+                    reached |= 1 << dest
+                    result.append(pack_move(start, dest))
+                    stack.append(dest)
+
+    if grow_cells(red, blue, lily, side) or not result:
+        result.append(GROW_MOVE)
+    return result
+
+
+def search_moves(red: int, blue: int, lily: int, side: int,
+                 out: list[int]) -> list[int]:
+    """
+    Append the moves the agent's searches consider to `out` (e.g. a search's
+    preallocated per-ply buffer), as packed moves carrying their paths (see
+    `tt.with_path`): every step, then the maximal jumps (see `jump_moves`),
+    then a grow unless it would add no lily pads (a pass) and there are
+    other moves. Returns `out`.
+    """
+    own = red if side == RED else blue
+    count = len(out)
+    step_moves(own, lily, side, out)
+    jump_moves(own, red | blue, lily, side, out)
+    if grow_cells(red, blue, lily, side) or len(out) == count:
+        out.append(GROW_MOVE)
+    return out
+
+
+def step_moves(own: int, targets: int, side: int, out: list[int]):
+    """
+    Append the steps of the given side's frogs `own` onto the cells of
+    `targets` (which must be free lily pads) to `out`, as packed moves
+    carrying their paths.
+    """
+    steps = _CODED_STEPS[side]
+    frogs = own
+    while frogs:
+        bit = frogs & -frogs
+        frogs ^= bit
+        start = bit.bit_length() - 1
+        for code, dest in steps[start]:
+            if targets >> dest & 1:
+                out.append(with_path(pack_move(start, dest), code))
+
+
+def jump_moves(own: int, occupied: int, lily: int, side: int,
+               out: list[int]):
+    """
+    Append every maximal jump sequence (one that cannot hop any further) of
+    the given side's frogs `own` to `out`, as packed moves carrying their
+    paths. Sequences of a frog reaching the same destination lead to the
+    same position, so only the first found is listed.
+    """
+    hops = _CODED_HOPS[side]
+    frogs = own
+    while frogs:
+        bit = frogs & -frogs
+        frogs ^= bit
+        start = bit.bit_length() - 1
+
+        # The jumping frog has left its start cell, so cannot hop over it
+        jumpable = occupied ^ bit
+        landed = 0
+        stack = [(start, bit, 0, 0)]    # Cell, cells visited, path, hops
+        while stack:
+            current, visited, path, n = stack.pop()
+            extended = False
+            for code, over, dest in hops[current]:
+                if jumpable >> over & 1 and lily >> dest & 1 \
+                        and not visited >> dest & 1:
+                    extended = True
+                    stack.append((dest, visited | 1 << dest,
+                                  path | code << PATH_BITS * n, n + 1))
+            if not extended and n and not landed >> current & 1:
+                landed |= 1 << current
+                out.append(with_path(pack_move(start, current), path))
+
+
+def forward_hop_landings(red: int, blue: int, lily: int, side: int) -> int:
+    """
+    The cells (as a mask) the given side could land on with a forward hop
+    (the first hop of a forward jump), were it its turn.
+    """
+    occupied = red | blue
+    hops = _FORWARD_HOPS[side]
+    landings = 0
+    frogs = red if side == RED else blue
+    while frogs:
+        bit = frogs & -frogs
+        frogs ^= bit
+        for over, dest in hops[bit.bit_length() - 1]:
+            if occupied >> over & 1 and lily >> dest & 1:
+                landings |= 1 << dest
+    return landings
+
+
+def play(red: int, blue: int, lily: int, side: int,
+         move: int) -> tuple[int, int, int]:
+    """
+    The (red, blue, lily) masks after the given side plays a packed move
+    (any path it carries is ignored).
+    """
+    if move == GROW_MOVE:
+        return red, blue, lily | grow_cells(red, blue, lily, side)
+    start, dest = move_squares(move)
+    bits = 1 << start | 1 << dest
+    if side == RED:
+        return red ^ bits, blue, lily & ~bits
+    return red, blue ^ bits, lily & ~bits
+
+
+def grow_cells(red: int, blue: int, lily: int, side: int) -> int:
+    """
+    The cells a grow by the given side would turn into lily pads: the free
+    cells next to its frogs. A grow adding none is a pass.
+    """
+    own = red if side == RED else blue
+    return neighbours(own) & ~(red | blue | lily)
+
+
+def move_gain(move: int, side: int) -> int:
+    """
+    The number of rows a packed move advances the moving frog (0 for a grow).
+    """
+    if move == GROW_MOVE:
+        return 0
+    start, dest = move_squares(move)
+    gain = dest // BOARD_N - start // BOARD_N
+    return gain if side == RED else -gain
+
+
+def to_action(red: int, blue: int, lily: int, side: int,
+              move: int) -> Action:
+    """
+    The referee action for a packed move, reconstructing a jump path.
+    """
+    if move == GROW_MOVE:
+        return GrowAction()
+    start, dest = move_squares(move)
+    coord = Coord(start // BOARD_N, start % BOARD_N)
+    for direction in SIDE_DIRECTIONS[side]:
+        if _offset(start, direction) == dest:
+            return MoveAction(coord, (direction,))
+
+    jumpable = (red | blue) & ~(1 << start)
+    paths = {start: []}
+    frontier = [start]
+    while frontier:
+        current = frontier.pop(0)
+        for direction in SIDE_DIRECTIONS[side]:
+            over = _offset(current, direction)
+            landing = _offset(current, direction, 2)
+            if landing is None or landing in paths \
+                    or not jumpable >> over & 1 or not lily >> landing & 1:
+                continue
+            paths[landing] = paths[current] + [direction]
+            if landing == dest:
+                return MoveAction(coord, tuple(paths[landing]))
+            frontier.append(landing)
+    raise ValueError(f"no jump path for move {start} -> {dest}")
+
+
+def from_action(red: int, blue: int, lily: int, side: int,
+                action: Action) -> int:
+    """
+    The packed move of a referee action (the inverse of `to_action`).
+    """
+    if isinstance(action, GrowAction):
+        return GROW_MOVE
+    start = action.coord.r * BOARD_N + action.coord.c
+    directions = action.directions
+    step = _offset(start, directions[0])
+    if len(directions) == 1 and step is not None and lily >> step & 1:
+        return pack_move(start, step)
+    dest = start
+    for direction in directions:
+        dest = _offset(dest, direction, 2)
+    return pack_move(start, dest)
@@ -0,0 +1,176 @@
+# COMP30024 Artificial Intelligence, Semester 1 2025
+# Project Part B: Game Playing Agent
+
+# Opening book: the best move, found by a deep search, for positions in the
+# first few plies from the (always identical) starting position. It is built
+# offline, searching each ply's positions across a process pool:
+#
+#   python -m agent.book [--plies N] [--width W] [--max-nodes N]
+#
+# and written to `book.bin` next to this file as a header followed by fixed
+# size (canonical key, move) records sorted by key, which the agent maps into
+# memory and binary searches.
+
+import argparse
+import struct
+from pathlib import Path
+
+from referee.game import PlayerColor, Coord
+from referee.game.constants import BOARD_N
+
+from .bitboard import RED, from_sets, moves, play
+from .patterns import PatternDatabase
+from .tables import MappedFile
+from .tt import TranspositionTable, board_keys, canonical, \
+    transform_move, NO_MOVE, GROW_MOVE, MOVE_MASK
+
+BOOK_FILE = Path(__file__).with_name("book.bin")
+BOOK_PLIES = 6              # Plies from the start covered by the book
+BOOK_WIDTH = 3              # Replies followed from each book position
+BOOK_DEPTH = 16             # Iterative deepening limit per position
+BOOK_MAX_NODES = 40000      # Node budget per position
+
+_HEADER = struct.Struct("<4sHHI")   # Magic, version, plies, records
+_RECORD = struct.Struct("<QH")      # Canonical key, move (canonical frame)
+_MAGIC = b"FBOK"
+_VERSION = 1
+
+
+def _coords(mask: int) -> set[Coord]:
+    return {Coord(*divmod(sq, BOARD_N))
+            for sq in range(BOARD_N * BOARD_N) if mask >> sq & 1}
+
+
+def book_key(red: int, blue: int, lily: int, side: int) -> tuple[int, int]:
+    """
+    The canonical key of a position (as bitboards, see bitboard.py) and the
+    symmetry mapping it to its canonical frame.
+    """
+    return canonical(board_keys(red, blue, lily, side))
+
+
+class OpeningBook(MappedFile):
+    """
+    An opening book file: a header (magic, version, plies, records) then
+    fixed size (canonical key, move) records sorted by key, binary searched
+    in place. Moves are in the canonical frame of their position.
+    """
+    def __init__(self, path: Path = BOOK_FILE):
+        super().__init__(path)
+        magic, version, self.plies, self._records = \
+            _HEADER.unpack_from(self._mmap)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"{path} is not a compatible opening book")
+        assert len(self._mmap) == _HEADER.size + self._records * _RECORD.size
+
+    def __len__(self) -> int:
+        return self._records
+
+    def lookup(self, red: int, blue: int, lily: int, side: int) -> int:
+        """
+        The book's (packed) move for a position, or NO_MOVE if it has none.
+        """
+        key, symmetry = book_key(red, blue, lily, side)
+        lo, hi = 0, self._records
+        while lo < hi:
+            mid = (lo + hi) // 2
+            mid_key, move = _RECORD.unpack_from(
+                self._mmap, _HEADER.size + mid * _RECORD.size)
+            if mid_key == key:
+                return transform_move(move, symmetry)
+            if mid_key < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return NO_MOVE
+
+
+# Per-worker search state of the book builder
+_searcher = None
+_evaluator = None
+
+
+def _init_worker():
+    global _searcher, _evaluator
+    from .evaluation import Evaluator
+    from .search import PrincipalVariationSearch
+    _evaluator = Evaluator.load(PatternDatabase.open())
+    _searcher = PrincipalVariationSearch(tt=TranspositionTable(),
+                                         evaluator=_evaluator)
+
+
+def _search_position(job) -> tuple[int, int]:
+    # Deep search of one position, returning its canonical key and move
+    from .program import GameStateNode
+    (red, blue, lily, side), max_nodes = job
+    color = PlayerColor.RED if side == RED else PlayerColor.BLUE
+    root = GameStateNode(_coords(red), _coords(blue), _coords(lily),
+                         isMax=True, color=color)
+    _searcher.search(root, BOOK_DEPTH, max_nodes)
+    move = _searcher.pv[0] & MOVE_MASK if _searcher.pv else GROW_MOVE
+    key, symmetry = book_key(red, blue, lily, side)
+    return key, transform_move(move, symmetry)
+
+
+def _replies(position, best: int, width: int, evaluator) -> list:
+    # The positions after the best move, then after the moves which look
+    # best to the static evaluation, up to `width` of them
+    red, blue, lily, side = position
+
+    def score(move):
+        value = evaluator.evaluate(*play(red, blue, lily, side, move))
+        return value if side == RED else -value
+
+    ranked = sorted(moves(red, blue, lily, side),
+                    key=lambda move: (move != best, -score(move)))
+    return [(*play(red, blue, lily, side, move), side ^ 1)
+            for move in ranked[:width]]
+
+
+def build(path: Path = BOOK_FILE, plies: int = BOOK_PLIES,
+          width: int = BOOK_WIDTH, max_nodes: int = BOOK_MAX_NODES,
+          processes: int | None = None):
+    """
+    Build an opening book and write it to `path`. Positions are searched a
+    ply at a time; each is followed by its best move and the next best
+    (`width` in all) looking moves, so both sides' likely lines are covered.
+    """
+    from multiprocessing import Pool
+    from .evaluation import Evaluator
+    from .program import Agent
+    evaluator = Evaluator.load(PatternDatabase.open())
+    start = Agent(PlayerColor.RED)
+    level = [(*from_sets(start.red_frogs, start.blue_frogs, start.lily_pads),
+              RED)]
+    book: dict[int, int] = {}
+    with Pool(processes, initializer=_init_worker) as pool:
+        for _ in range(plies):
+            results = pool.map(_search_position,
+                               [(position, max_nodes) for position in level])
+            next_level = {}
+            for position, (key, move) in zip(level, results):
+                book[key] = move
+                _, symmetry = book_key(*position)
+                best = transform_move(move, symmetry)
+                for child in _replies(position, best, width, evaluator):
+                    child_key, _ = book_key(*child)
+                    if child_key not in book:
+                        next_level.setdefault(child_key, child)
+            level = list(next_level.values())
+
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, plies, len(book)))
+        for key in sorted(book):
+            f.write(_RECORD.pack(key, book[key]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the opening book.")
+    parser.add_argument("--plies", type=int, default=BOOK_PLIES)
+    parser.add_argument("--width", type=int, default=BOOK_WIDTH)
+    parser.add_argument("--max-nodes", type=int, default=BOOK_MAX_NODES)
+    parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args()
+    build(plies=args.plies, width=args.width, max_nodes=args.max_nodes,
+          processes=args.processes)
+    print(f"wrote {BOOK_FILE}")
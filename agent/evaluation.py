@@ -0,0 +1,314 @@
+# COMP30024 Artificial Intelligence, Semester 1 2025
+# Project Part B: Game Playing Agent
+
+import json
+from array import array
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from referee.game.constants import BOARD_N
+
+from .bitboard import RED, BLUE, FULL_MASK, ROW_MASKS, GOAL_MASKS, \
+    neighbours, progress, _NOT_FIRST_COL, _NOT_LAST_COL
+from .patterns import PatternDatabase, PATTERNS, _COLUMN_MASKS, _BESIDE
+
+# Features of a position, each red's value minus blue's:
+#   distance    pattern database estimate of turns to finish (blue's minus
+#               red's, so that being closer scores higher)
+#   progress    rows advanced by the frogs
+#   goal        frogs on the goal row
+#   lily        free lily pads next to the frogs
+#   jumps       forward hops available to the frogs
+FEATURES = ("distance", "progress", "goal", "lily", "jumps")
+
+# Weights fitted to game results by tuning.py, loaded by the agent if present
+WEIGHTS_FILE = Path(__file__).with_name("weights.json")
+
+BATCH_MIN = 8       # Fewest positions worth evaluating as a NumPy batch
+
+# Scores are fixed point, SCORE_SCALE to one unit of weighted features, and
+# clamped to what the transposition table and evaluation cache hold
+SCORE_SCALE = 100
+MAX_SCORE = (1 << 15) - 1
+
+EVAL_CACHE_ENTRIES = 1 << 16        # Entries if there is no space limit
+EVAL_CACHE_SPACE_FRACTION = 1 / 32  # Share of the space limit to spend
+_SCORE_OFFSET = 1 << 15
+
+# Frogs which can hop diagonally without leaving the board: columns 2 and up
+# (hopping left) and 5 and down (hopping right)
+_FROM_COL_2 = sum(ROW_MASKS[r] & ~(0b11 << r * BOARD_N)
+                  for r in range(BOARD_N))
+_TO_COL_5 = sum(ROW_MASKS[r] & ~(0b11000000 << r * BOARD_N)
+                for r in range(BOARD_N))
+
+# (frog mask, shift to the jumped-over cell, shift to the landing cell) of
+# each forward hop direction, per side; red hops towards higher bits
+_HOP_SHIFTS = [
+    ((FULL_MASK, 8, 16), (_FROM_COL_2, 7, 14), (_TO_COL_5, 9, 18)),
+    ((FULL_MASK, 8, 16), (_FROM_COL_2, 9, 18), (_TO_COL_5, 7, 14)),
+]
+
+
+def _forward_hops(frogs: int, occupied: int, free: int, side: int) -> int:
+    count = 0
+    for mask, over, dest in _HOP_SHIFTS[side]:
+        if side == RED:
+            count += (frogs & mask & occupied >> over & free >> dest) \
+                .bit_count()
+        else:
+            count += (frogs & mask & occupied << over & free << dest) \
+                .bit_count()
+    return count
+
+
+class Evaluator:
+    """
+    Linear evaluation: a weighted sum of the `FEATURES` of a position, from
+    red's point of view, in fixed point (see `SCORE_SCALE`). Each weight is
+    rounded to a whole number of score units once, when the evaluator is
+    made, so that scores are integral (the transposition table only stores
+    integral scores) and `evaluate` and `evaluate_batch` agree exactly. A
+    non-zero weight which would round to zero is an error. Only features
+    with a non-zero weight are computed.
+
+    Positions are given as bitboards (red frogs, blue frogs, free lily pads;
+    see `bitboard.from_sets`). With NumPy, `evaluate_batch` scores many
+    positions (e.g. all children of a node) with one set of array operations
+    and a single dot product.
+    """
+    def __init__(self, weights: dict[str, float],
+                 patterns: PatternDatabase | None = None):
+        unknown = set(weights) - set(FEATURES)
+        if unknown:
+            raise ValueError(f"unknown features: {sorted(unknown)}")
+        if weights.get("distance") and patterns is None:
+            raise ValueError("the distance feature needs a pattern database")
+        self.weights = {name: weights.get(name, 0) for name in FEATURES}
+        self._patterns = patterns
+        self._fixed = {name: round(weight * SCORE_SCALE)
+                       for name, weight in self.weights.items()}
+        lost = [name for name in FEATURES
+                if self.weights[name] and not self._fixed[name]]
+        if lost:
+            raise ValueError(f"weights of {lost} round to zero at score "
+                             f"scale {SCORE_SCALE} (normalise them)")
+        self._active = [name for name in FEATURES if self._fixed[name]]
+        self._table = None
+        if np is not None and patterns is not None:
+            self._table = np.frombuffer(patterns.table, dtype=np.uint8)
+
+    @classmethod
+    def default(cls, patterns: PatternDatabase | None) -> 'Evaluator':
+        """
+        Distance to goal if a pattern database is available, else progress.
+        """
+        if patterns is not None:
+            return cls({"distance": 1}, patterns)
+        return cls({"progress": 1})
+
+    @classmethod
+    def load(cls, patterns: PatternDatabase | None,
+             path: Path = WEIGHTS_FILE) -> 'Evaluator':
+        """
+        The evaluator with the weights saved at `path`, or the default one if
+        there are none (or they need a missing pattern database).
+        """
+        try:
+            weights = json.loads(path.read_text())
+        except FileNotFoundError:
+            return cls.default(patterns)
+        if weights.get("distance") and patterns is None:
+            return cls.default(patterns)
+        return cls(weights, patterns)
+
+    def save(self, path: Path = WEIGHTS_FILE):
+        path.write_text(json.dumps(self.weights, indent=4) + "\n")
+
+    def features(self, red: int, blue: int, free: int,
+                 names=FEATURES) -> list[int]:
+        """
+        The values of the named features of a position.
+        """
+        values = []
+        for name in names:
+            if name == "distance":
+                if self._patterns is None:
+                    values.append(0)
+                    continue
+                red_distance, blue_distance = \
+                    self._patterns.distances(red, blue, free)
+                values.append(blue_distance - red_distance)
+            elif name == "progress":
+                red_rows, blue_rows = progress(red, blue)
+                values.append(red_rows - blue_rows)
+            elif name == "goal":
+                values.append((red & GOAL_MASKS[RED]).bit_count()
+                              - (blue & GOAL_MASKS[BLUE]).bit_count())
+            elif name == "lily":
+                values.append((neighbours(red) & free).bit_count()
+                              - (neighbours(blue) & free).bit_count())
+            elif name == "jumps":
+                occupied = red | blue
+                values.append(_forward_hops(red, occupied, free, RED)
+                              - _forward_hops(blue, occupied, free, BLUE))
+        return values
+
+    def evaluate(self, red: int, blue: int, free: int) -> int:
+        values = self.features(red, blue, free, self._active)
+        score = sum(self._fixed[name] * value
+                    for name, value in zip(self._active, values))
+        return max(-MAX_SCORE, min(score, MAX_SCORE))
+
+    def evaluate_batch(self, positions: list[tuple[int, int, int]]
+                       ) -> list[int]:
+        """
+        The scores of several positions, the same as `evaluate` gives.
+        """
+        if np is None or len(positions) < BATCH_MIN:
+            return [self.evaluate(*position) for position in positions]
+        boards = np.array(positions, dtype=np.uint64)
+        features = batch_features(boards, self._active, self._table)
+        weights = np.array([self._fixed[name] for name in self._active],
+                           dtype=np.int64)
+        scores = features.astype(np.int64) @ weights
+        return np.clip(scores, -MAX_SCORE, MAX_SCORE).tolist()
+
+
+class EvaluationCache:
+    """
+    A fixed-size, direct-mapped cache of static evaluations, keyed by a
+    position's Zobrist hash (see tt.py) and kept apart from the
+    transposition table, so that search results and evaluations never
+    displace each other.
+
+    Each entry is one 64-bit word: the key's upper 48 bits and the score in
+    the lower 16. A slot holds the last position stored in it.
+    """
+    def __init__(self, entries: int = EVAL_CACHE_ENTRIES):
+        assert entries & (entries - 1) == 0, "entries must be a power of two"
+        self._table = array("Q", [0]) * entries
+        self._mask = entries - 1
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def entries_for(space_limit: float | None) -> int:
+        """
+        The number of entries to use under the referee's space limit (in
+        MB): the largest power of two fitting in its share of the limit.
+        """
+        if space_limit is None:
+            return EVAL_CACHE_ENTRIES
+        budget = int(space_limit * EVAL_CACHE_SPACE_FRACTION * (1 << 20) / 8)
+        return 1 << max(budget.bit_length() - 1, 0)
+
+    def probe(self, key: int) -> int | None:
+        word = self._table[key & self._mask]
+        if word and word >> 16 == key >> 16:
+            self.hits += 1
+            return (word & 0xFFFF) - _SCORE_OFFSET
+        self.misses += 1
+        return None
+
+    def store(self, key: int, score: int):
+        self._table[key & self._mask] = \
+            key & ~0xFFFF | (score + _SCORE_OFFSET) & 0xFFFF
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / max(self.hits + self.misses, 1)
+
+
+# Vectorised features over (positions, 3) uint64 arrays of bitboards
+
+if np is not None:
+    _SQUARES = np.arange(BOARD_N * BOARD_N, dtype=np.uint64)
+    # Shifts bringing each square's window (see patterns.py) to bit 0
+    _RIGHT = np.maximum(_SQUARES.astype(np.int64) - 2, 0).astype(np.uint64)
+    _LEFT = np.maximum(2 - _SQUARES.astype(np.int64), 0).astype(np.uint64)
+    _WINDOW_MASKS = np.array(
+        [_COLUMN_MASKS[sq % BOARD_N] for sq in range(BOARD_N * BOARD_N)],
+        dtype=np.uint64)
+    _BESIDE_CODES = np.array(_BESIDE, dtype=np.int64)
+    _OFFSETS = np.arange(BOARD_N * BOARD_N, dtype=np.int64) * PATTERNS
+    _ROWS = np.array(ROW_MASKS, dtype=np.uint64)
+    _GOALS = np.array(GOAL_MASKS, dtype=np.uint64)
+
+
+def _popcount(x: 'np.ndarray') -> 'np.ndarray':
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(x).astype(np.int64)
+    bits = np.unpackbits(np.ascontiguousarray(x).view(np.uint8), axis=-1)
+    return bits.reshape(*x.shape, -1).sum(axis=-1)
+
+
+def _batch_distance(table, frogs, free) -> 'np.ndarray':
+    # Total pattern distance of red-frame frogs, looking up every square
+    windows = ((free[:, None] >> _RIGHT) << _LEFT) & _WINDOW_MASKS
+    patterns = _BESIDE_CODES[(windows & np.uint64(0x1F)).astype(np.int64)] \
+        | ((windows >> np.uint64(6)) & np.uint64(0x7C)).astype(np.int64) \
+        | ((windows >> np.uint64(9)) & np.uint64(0xF80)).astype(np.int64)
+    distances = table[_OFFSETS + patterns]
+    own = ((frogs[:, None] >> _SQUARES) & np.uint64(1)).astype(np.int64)
+    return (distances * own).sum(axis=1)
+
+
+def _batch_hops(frogs, occupied, free, side: int) -> 'np.ndarray':
+    count = 0
+    for mask, over, dest in _HOP_SHIFTS[side]:
+        over, dest = np.uint64(over), np.uint64(dest)
+        if side == RED:
+            hops = frogs & np.uint64(mask) & (occupied >> over) \
+                & (free >> dest)
+        else:
+            hops = frogs & np.uint64(mask) & (occupied << over) \
+                & (free << dest)
+        count = count + _popcount(hops)
+    return count
+
+
+def _batch_neighbours(mask) -> 'np.ndarray':
+    row = mask | ((mask << np.uint64(1)) & np.uint64(_NOT_FIRST_COL)) \
+        | ((mask >> np.uint64(1)) & np.uint64(_NOT_LAST_COL))
+    return row | (row << np.uint64(BOARD_N)) | (row >> np.uint64(BOARD_N))
+
+
+def batch_features(boards: 'np.ndarray', names=FEATURES,
+                   table: 'np.ndarray | None' = None) -> 'np.ndarray':
+    """
+    The named features of each position in a (positions, 3) uint64 array of
+    (red, blue, free lily) bitboards, as a (positions, features) array. The
+    distance feature needs the pattern table (as a uint8 array).
+    """
+    red, blue, free = boards[:, 0], boards[:, 1], boards[:, 2]
+    columns = []
+    for name in names:
+        if name == "distance":
+            if table is None:
+                columns.append(np.zeros(len(boards), dtype=np.int64))
+                continue
+            columns.append(
+                _batch_distance(table, blue.byteswap(), free.byteswap())
+                - _batch_distance(table, red, free))
+        elif name == "progress":
+            column = 0
+            for r in range(BOARD_N):
+                column = column + r * _popcount(red & _ROWS[r]) \
+                    - (BOARD_N - 1 - r) * _popcount(blue & _ROWS[r])
+            columns.append(column)
+        elif name == "goal":
+            columns.append(_popcount(red & _GOALS[RED])
+                           - _popcount(blue & _GOALS[BLUE]))
+        elif name == "lily":
+            columns.append(_popcount(_batch_neighbours(red) & free)
+                           - _popcount(_batch_neighbours(blue) & free))
+        elif name == "jumps":
+            occupied = red | blue
+            columns.append(_batch_hops(red, occupied, free, RED)
+                           - _batch_hops(blue, occupied, free, BLUE))
+    return np.stack(columns, axis=1).astype(np.float64)
@@ -0,0 +1,293 @@
+# COMP30024 Artificial Intelligence, Semester 1 2025
+# Project Part B: Game Playing Agent
+
+from array import array
+from math import exp, log, sqrt
+from random import Random
+
+from referee.game import Action
+from referee.game.constants import BOARD_N, MAX_TURNS
+
+from .bitboard import RED, moves, play, goal_count, progress, move_gain, \
+    to_action
+
+MCTS_PLAYOUTS = 3000            # Playouts per action
+ARENA_NODES = 1 << 18           # Node capacity if there is no space limit
+ARENA_SPACE_FRACTION = 0.25     # Share of the space limit to spend on nodes
+
+UCT_C = 0.7                     # Exploration constant
+PRIOR_WEIGHT = 1.0              # Weight of the move prior (decays by visits)
+PRIOR_TEMPERATURE = 1.0         # Prior ~ exp(temperature * rows gained)
+UNVISITED_VALUE = 0.5           # Value assumed for an unvisited child
+
+ROLLOUT_PLIES = 12              # Random plies before scoring a playout
+ROLLOUT_GREEDY = 0.6            # Chance a rollout plays its most forward move
+ROLLOUT_SCALE = 4.0             # Row difference scored as a ~73% win
+
+
+class NodeArena:
+    """
+    Preallocated store of search tree nodes, as parallel arrays indexed by
+    node number rather than one object per node. The children of a node take
+    up a contiguous block of indices from `first_child`. Node 0 is always the
+    root, so a `first_child` of 0 marks a node that has not been expanded.
+
+    Values are total playout results from the perspective of the player who
+    made the move leading to the node.
+    """
+    NODE_BYTES = 4 + 8 + 4 + 2 + 4 + 2
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.visits = array('I', bytes(4 * capacity))
+        self.value = array('d', bytes(8 * capacity))
+        self.prior = array('f', bytes(4 * capacity))
+        self.move = array('H', bytes(2 * capacity))
+        self.first_child = array('I', bytes(4 * capacity))
+        self.num_children = array('H', bytes(2 * capacity))
+        self.clear()
+
+    def clear(self):
+        """
+        Remove every node except a fresh root.
+        """
+        self.size = 1
+        self.visits[0] = 0
+        self.value[0] = 0.0
+        self.first_child[0] = 0
+        self.num_children[0] = 0
+
+    def expand(self, node: int, moves: list[int],
+               priors: list[float]) -> bool:
+        """
+        Allocate (unvisited) children of a node for the given moves, unless
+        the arena is full. Returns whether the node was expanded.
+        """
+        n = len(moves)
+        first = self.size
+        if first + n > self.capacity:
+            return False
+        end = first + n
+        self.size = end
+        self.visits[first:end] = array('I', bytes(4 * n))
+        self.value[first:end] = array('d', bytes(8 * n))
+        self.prior[first:end] = array('f', priors)
+        self.move[first:end] = array('H', moves)
+        self.first_child[first:end] = array('I', bytes(4 * n))
+        self.num_children[first:end] = array('H', bytes(2 * n))
+        self.first_child[node] = first
+        self.num_children[node] = n
+        return True
+
+    def find_child(self, node: int, move: int) -> int:
+        """
+        The child of a node reached by a move, or 0 if there is none.
+        """
+        first = self.first_child[node]
+        for child in range(first, first + self.num_children[node]):
+            if self.move[child] == move:
+                return child
+        return 0
+
+    def copy_subtree(self, source: 'NodeArena', root: int):
+        """
+        Replace this arena's contents with the subtree of `source` under the
+        given node, which becomes the new root. Blocks of siblings are copied
+        in breadth-first order, so the copy is compact.
+        """
+        self.clear()
+        self.visits[0] = source.visits[root]
+        self.value[0] = source.value[root]
+        queue = [(root, 0)]
+        for old, new in queue:
+            n = source.num_children[old]
+            if n == 0:
+                continue
+            old_first = source.first_child[old]
+            first = self.size
+            self.size += n
+            for name in ("visits", "value", "prior", "move"):
+                getattr(self, name)[first:first + n] = \
+                    getattr(source, name)[old_first:old_first + n]
+            self.first_child[first:first + n] = array('I', bytes(4 * n))
+            self.num_children[first:first + n] = array('H', bytes(2 * n))
+            self.first_child[new] = first
+            self.num_children[new] = n
+            queue.extend(zip(range(old_first, old_first + n),
+                             range(first, first + n)))
+
+
+class MonteCarloTreeSearch:
+    """
+    Monte Carlo tree search with UCT selection (biased towards forward moves
+    by a prior which decays with visits), over bitboard positions (see
+    `bitboard.py`). Positions are not stored in the tree; each playout replays
+    the moves along its path from the root.
+
+    The tree lives in a `NodeArena` of fixed capacity, so memory use is
+    bounded however many playouts are run: once the arena is full, playouts
+    continue without adding nodes. After each move is played (`advance`), the
+    subtree under it is compacted into a second arena and becomes the new
+    tree.
+    """
+    def __init__(self, capacity: int = ARENA_NODES, seed: int | None = None):
+        self._arena = NodeArena(capacity)
+        self._spare = NodeArena(capacity)
+        self._rng = Random(seed)
+        self._root: tuple[int, int, int, int, int] | None = None
+        self.playouts = 0
+
+    @staticmethod
+    def capacity_for(space_limit: float | None) -> int:
+        """
+        The node capacity to use under the referee's space limit (in MB).
+        """
+        if space_limit is None:
+            return ARENA_NODES
+        # Two arenas are kept (see `advance`)
+        return int(space_limit * ARENA_SPACE_FRACTION * (1 << 20)
+                   / (2 * NodeArena.NODE_BYTES))
+
+    @property
+    def tree_size(self) -> int:
+        return self._arena.size
+
+    def search(self, red: int, blue: int, lily: int, side: int, turn: int,
+               playouts: int = MCTS_PLAYOUTS) -> Action:
+        """
+        Run playouts from the given position (side to move, and number of
+        turns played so far), reusing the existing tree if it is rooted at
+        this position, and return the most visited move.
+        """
+        root = (red, blue, lily, side, turn)
+        if root != self._root:
+            self._root = root
+            self._arena.clear()
+
+        self.playouts = 0
+        for _ in range(playouts):
+            self._playout()
+            self.playouts += 1
+
+        arena = self._arena
+        if arena.num_children[0] == 0:
+            # No room to expand the root (or no playouts run): play greedily
+            legal = moves(red, blue, lily, side)
+            move = max(legal, key=lambda move: move_gain(move, side))
+            return to_action(red, blue, lily, side, move)
+
+        first = arena.first_child[0]
+        best = max(range(first, first + arena.num_children[0]),
+                   key=lambda child: arena.visits[child])
+        return to_action(red, blue, lily, side, arena.move[best])
+
+    def advance(self, move: int):
+        """
+        Move the root along a played (packed) move, keeping its subtree.
+        """
+        if self._root is None:
+            return
+        red, blue, lily, side, turn = self._root
+        self._root = (*play(red, blue, lily, side, move), side ^ 1, turn + 1)
+
+        child = self._arena.find_child(0, move)
+        if child:
+            self._spare.copy_subtree(self._arena, child)
+            self._arena, self._spare = self._spare, self._arena
+        else:
+            self._arena.clear()
+
+    def _playout(self):
+        arena = self._arena
+        red, blue, lily, side, turn = self._root
+        node = 0
+        path = [0]
+        while True:
+            value = _outcome(red, blue, side, turn)
+            if value is not None:
+                break
+            n = arena.num_children[node]
+            if n == 0:
+                legal = moves(red, blue, lily, side)
+                arena.expand(node, legal, _priors(legal, side))
+                value = self._rollout(red, blue, lily, side, turn, legal)
+                break
+            node = self._select(node, n)
+            red, blue, lily = play(red, blue, lily, side, arena.move[node])
+            side ^= 1
+            turn += 1
+            path.append(node)
+
+        # `value` is from the perspective of the player to move at the leaf
+        for node in reversed(path):
+            value = 1.0 - value
+            arena.visits[node] += 1
+            arena.value[node] += value
+
+    def _select(self, node: int, n: int) -> int:
+        arena = self._arena
+        visits, value, prior = arena.visits, arena.value, arena.prior
+        log_n = log(visits[node] + 1)
+        first = arena.first_child[node]
+        best, best_score = first, -1.0
+        for child in range(first, first + n):
+            child_visits = visits[child]
+            q = value[child] / child_visits if child_visits \
+                else UNVISITED_VALUE
+            score = q + UCT_C * sqrt(log_n / (child_visits + 1)) \
+                + PRIOR_WEIGHT * prior[child] / (child_visits + 1)
+            if score > best_score:
+                best, best_score = child, score
+        return best
+
+    def _rollout(self, red: int, blue: int, lily: int, side: int, turn: int,
+                 legal: list[int]) -> float:
+        """
+        Play a short semi-random continuation and score the final position,
+        from the perspective of the player to move at the start.
+        """
+        rng = self._rng
+        perspective = side
+        for ply in range(ROLLOUT_PLIES):
+            if ply > 0:
+                legal = moves(red, blue, lily, side)
+            if rng.random() < ROLLOUT_GREEDY:
+                gains = [move_gain(move, side) for move in legal]
+                top = max(gains)
+                move = rng.choice(
+                    [m for m, g in zip(legal, gains) if g == top])
+            else:
+                move = rng.choice(legal)
+            red, blue, lily = play(red, blue, lily, side, move)
+            side ^= 1
+            turn += 1
+            value = _outcome(red, blue, side, turn)
+            if value is not None:
+                return value if side == perspective else 1.0 - value
+
+        red_rows, blue_rows = progress(red, blue)
+        lead = red_rows - blue_rows if perspective == RED \
+            else blue_rows - red_rows
+        return 1.0 / (1.0 + exp(-lead / ROLLOUT_SCALE))
+
+
+def _outcome(red: int, blue: int, side: int, turn: int) -> float | None:
+    """
+    The result of a finished game (1 for a win, 0.5 for a draw) for the given
+    side, or None if the game is not over.
+    """
+    red_score = goal_count(red, blue, 0)
+    blue_score = goal_count(red, blue, 1)
+    if turn < MAX_TURNS and red_score < BOARD_N - 2 \
+            and blue_score < BOARD_N - 2:
+        return None
+    if red_score == blue_score:
+        return 0.5
+    return 1.0 if (red_score > blue_score) == (side == RED) else 0.0
+
+
+def _priors(legal: list[int], side: int) -> list[float]:
+    weights = [exp(PRIOR_TEMPERATURE * move_gain(move, side))
+               for move in legal]
+    total = sum(weights)
+    return [weight / total for weight in weights]
@@ -0,0 +1,142 @@
+# COMP30024 Artificial Intelligence, Semester 1 2025
+# Project Part B: Game Playing Agent
+
+import multiprocessing as mp
+import sys
+import weakref
+from multiprocessing.shared_memory import SharedMemory
+
+from referee.game import Action
+
+from .search import PrincipalVariationSearch, SearchOptions
+from .tt import TranspositionTable, TT_ENTRIES
+
+
+class LazySMPPool:
+    """
+    A pool of helper processes for "lazy SMP" parallel search. For every
+    search, each helper runs the same iterative deepening search as the main
+    process (starting at a staggered depth, so that helpers diverge from the
+    main search and from each other), and all of them share one transposition
+    table in shared memory. The helpers' only output is the table entries they
+    write, which the main search picks up as cutoffs and move ordering.
+
+    The helper processes are started once and reused for every search. Each
+    evaluates positions with the given evaluation weights (the saved ones by
+    default; see evaluation.py) and its own evaluation cache.
+    """
+    def __init__(
+        self,
+        num_workers: int,
+        options: SearchOptions = SearchOptions(),
+        tt_entries: int = TT_ENTRIES,
+        weights: dict[str, float] | None = None,
+    ):
+        self._shm = SharedMemory(
+            create=True, size=TranspositionTable.buffer_size(tt_entries))
+        self.tt = TranspositionTable(self._shm.buf, tt_entries)
+
+        methods = mp.get_all_start_methods()
+        ctx = mp.get_context("fork" if "fork" in methods else None)
+        self._stop = ctx.Event()
+        self._conns = []
+        self._workers = []
+
+        # The referee replaces stdin in agent processes with an object that
+        # multiprocessing cannot close in the child, so hide it during start
+        stdin, sys.stdin = sys.stdin, None
+        try:
+            for i in range(num_workers):
+                conn, worker_conn = ctx.Pipe()
+                worker = ctx.Process(
+                    target=_worker_main,
+                    args=(worker_conn, self._shm, tt_entries, options,
+                          weights, self._stop),
+                    daemon=True,
+                )
+                worker.start()
+                self._conns.append(conn)
+                self._workers.append(worker)
+        finally:
+            sys.stdin = stdin
+
+        self._finalizer = weakref.finalize(
+            self, _shutdown, self._conns, self._workers, self.tt, self._shm)
+
+    @property
+    def num_workers(self) -> int:
+        return len(self._workers)
+
+    def search(
+        self,
+        search: PrincipalVariationSearch,
+        root,
+        max_depth: int,
+        max_nodes: int | None = None,
+        pv: list[int] | None = None,
+    ) -> tuple[float, Action | None]:
+        """
+        Run `search` (which should use this pool's `tt`) on the root node in
+        this process, with the helpers searching the same position until it
+        finishes.
+        """
+        position = (root.red_frogs, root.blue_frogs, root.lily_pads,
+                    root.isMax, root.color)
+        self._stop.clear()
+        for i, conn in enumerate(self._conns):
+            conn.send((position, max_depth, 2 + i % 2, self.tt.generation))
+
+        try:
+            return search.search(root, max_depth, max_nodes, pv=pv)
+        finally:
+            # Wait for every helper to stop before the next search starts
+            self._stop.set()
+            for conn in self._conns:
+                conn.recv()
+
+    def close(self):
+        self._finalizer()
+
+
+def _worker_main(conn, shm: SharedMemory, tt_entries: int,
+                 options: SearchOptions, weights: dict[str, float] | None,
+                 stop):
+    from .evaluation import Evaluator, EvaluationCache
+    from .patterns import PatternDatabase
+    from .program import GameStateNode
+
+    patterns = PatternDatabase.open()
+    evaluator = Evaluator(weights, patterns) if weights is not None \
+        else Evaluator.load(patterns)
+    eval_cache = EvaluationCache()
+    tt = TranspositionTable(shm.buf, tt_entries)
+    search = PrincipalVariationSearch(options, tt=tt, evaluator=evaluator,
+                                      eval_cache=eval_cache)
+    try:
+        while (job := conn.recv()) is not None:
+            (red_frogs, blue_frogs, lily_pads, isMax, color), \
+                max_depth, start_depth, tt.generation = job
+            root = GameStateNode(red_frogs, blue_frogs, lily_pads,
+                                 isMax=isMax, color=color)
+            search.search(root, max_depth, start_depth=start_depth,
+                          should_stop=stop.is_set)
+            conn.send(search.depth)
+    except EOFError:
+        pass
+    finally:
+        tt.release()
+
+
+def _shutdown(conns, workers, tt: TranspositionTable, shm: SharedMemory):
+    for conn in conns:
+        try:
+            conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+    for worker in workers:
+        worker.join(timeout=1)
+        if worker.is_alive():
+            worker.terminate()
+    tt.release()
+    shm.close()
+    shm.unlink()
@@ -0,0 +1,198 @@
+# COMP30024 Artificial Intelligence, Semester 1 2025
+# Project Part B: Game Playing Agent
+
+# Distance-to-goal pattern database. For a frog on each square, and each
+# pattern of free lily pads in a small window ahead of (and beside) it, the
+# table holds the exact number of turns a lone frog needs to reach its goal
+# row, assuming every cell outside the window is a free lily pad. Summed over
+# a side's frogs this is a heuristic estimate rather than a bound, as it
+# ignores both frogs blocking each other and hops over frogs. Distances are
+# stored in red's frame; blue frogs are looked up with the board flipped
+# top-bottom.
+#
+# The table is built offline, with a process per CPU core:
+#
+#   python -m agent.patterns
+#
+# and written to `patterns.bin` next to this file, which the agent maps into
+# memory when it starts.
+
+import struct
+from pathlib import Path
+
+from referee.game.constants import BOARD_N
+
+from .bitboard import RED, FULL_MASK, ROW_MASKS, moves, play
+from .tables import MappedFile
+
+PATTERN_FILE = Path(__file__).with_name("patterns.bin")
+
+# Window cells, as (rows ahead, columns across) from the frog, in bit order
+WINDOW = (
+    (0, -1), (0, 1),
+    (1, -2), (1, -1), (1, 0), (1, 1), (1, 2),
+    (2, -2), (2, -1), (2, 0), (2, 1), (2, 2),
+)
+PATTERNS = 1 << len(WINDOW)
+
+_HEADER = struct.Struct("<4sHH")    # Magic, version, window size
+_MAGIC = b"FPDB"
+_VERSION = 1
+
+
+# The window's bit order follows the bitboard (see bitboard.py): shifting the
+# board so that the frog's square lands on bit 2 leaves the cells in front at
+# bits 8-12 and 16-20, and the two beside it at bits 1 and 3.
+_BESIDE = [(x >> 1 & 1) | (x >> 2 & 2) for x in range(1 << 5)]
+
+
+def _column_mask(c: int) -> int:
+    # Window bits (at the shifted positions above) which are on the board
+    columns = sum(1 << i for i in range(5) if 0 <= c + i - 2 < BOARD_N)
+    return columns | columns << BOARD_N | columns << 2 * BOARD_N
+
+
+_COLUMN_MASKS = [_column_mask(c) for c in range(BOARD_N)]
+
+
+def _flip(board: int) -> int:
+    # Flip a bitboard top-bottom (into the other colour's frame)
+    return int.from_bytes(board.to_bytes(BOARD_N, "little"), "big")
+
+
+class PatternDatabase(MappedFile):
+    """
+    A pattern database file: a header (magic, version, window size) then a
+    byte per square (in red's frame) and window pattern, holding the lone
+    frog distance, looked up in place (see `table`).
+    """
+    def __init__(self, path: Path = PATTERN_FILE):
+        super().__init__(path)
+        magic, version, window = _HEADER.unpack_from(self._mmap)
+        if magic != _MAGIC or version != _VERSION or window != len(WINDOW):
+            raise ValueError(f"{path} is not a compatible pattern database")
+        self._table = memoryview(self._mmap)[_HEADER.size:]
+        assert len(self._table) == BOARD_N * BOARD_N * PATTERNS
+
+    def close(self):
+        self._table.release()
+        super().close()
+
+    @property
+    def table(self) -> memoryview:
+        """
+        The distances, indexed by square (in red's frame) * PATTERNS +
+        pattern.
+        """
+        return self._table
+
+    def total_distance(self, frogs: int, free: int) -> int:
+        """
+        Heuristic estimate of the turns needed to move all the given red
+        frogs to the goal row, one at a time, given the bitboards of the
+        frogs and of the free (unoccupied) lily pads. Use `_flip` on both
+        for blue.
+        """
+        table = self._table
+        total = 0
+        while frogs:
+            frog = frogs & -frogs
+            frogs ^= frog
+            sq = frog.bit_length() - 1
+            shift = sq - 2
+            window = free >> shift if shift >= 0 else free << -shift
+            window &= _COLUMN_MASKS[sq & (BOARD_N - 1)]
+            pattern = _BESIDE[window & 0x1F] | (window >> 6 & 0x7C) \
+                | (window >> 9 & 0xF80)
+            total += table[sq * PATTERNS + pattern]
+        return total
+
+    def distances(self, red: int, blue: int,
+                  free: int) -> tuple[int, int]:
+        """
+        Heuristic estimates of the turns red and blue (respectively) need
+        to move all their frogs to their goal rows, given the bitboards of
+        each side's frogs and of the free lily pads (see `bitboard.from_sets`).
+        """
+        return (self.total_distance(red, free),
+                self.total_distance(_flip(blue), _flip(free)))
+
+
+def lone_frog_distance(sq: int, pattern: int) -> int:
+    """
+    The minimum number of turns a lone red frog on square `sq` needs to reach
+    the goal row, given which window cells are free lily pads, and assuming
+    every other cell is one.
+    """
+    r, c = divmod(sq, BOARD_N)
+    if r == BOARD_N - 1:
+        return 0
+    lily = FULL_MASK & ~(1 << sq)
+    for i, (ahead, across) in enumerate(WINDOW):
+        wr, wc = r + ahead, c + across
+        if 0 <= wr < BOARD_N and 0 <= wc < BOARD_N and not pattern >> i & 1:
+            lily &= ~(1 << wr * BOARD_N + wc)
+
+    # Beyond the window's rows every cell is a lily pad, so a frog that gets
+    # there needs exactly one step per remaining row. Search breadth-first
+    # over the window rows only.
+    exit_row = min(r + 3, BOARD_N - 1)
+    window_rows = sum(ROW_MASKS[row] for row in range(r, exit_row))
+    outside = FULL_MASK & ~window_rows
+    best = 2 * BOARD_N
+    frontier = {(1 << sq, lily & window_rows)}
+    seen = set(frontier)
+    turns = 0
+    while frontier and turns < best:
+        next_frontier = set()
+        for frog, window_lily in frontier:
+            for move in moves(frog, 0, window_lily | outside, RED):
+                frog_after, _, lily_after = play(
+                    frog, 0, window_lily | outside, RED, move)
+                row = (frog_after.bit_length() - 1) // BOARD_N
+                if row >= exit_row:
+                    best = min(best, turns + 1 + BOARD_N - 1 - row)
+                    continue
+                state = (frog_after, lily_after & window_rows)
+                if state not in seen:
+                    seen.add(state)
+                    next_frontier.add(state)
+        frontier = next_frontier
+        turns += 1
+    return best
+
+
+def _square_table(sq: int) -> bytes:
+    # Only patterns with every off-board window cell clear can occur; the
+    # others are filled in with the value of their on-board part
+    r, c = divmod(sq, BOARD_N)
+    on_board = sum(1 << i for i, (ahead, across) in enumerate(WINDOW)
+                   if 0 <= r + ahead < BOARD_N and 0 <= c + across < BOARD_N)
+    distances = {}
+    table = bytearray(PATTERNS)
+    for pattern in range(PATTERNS):
+        key = pattern & on_board
+        if key not in distances:
+            distances[key] = lone_frog_distance(sq, key)
+        table[pattern] = distances[key]
+    return bytes(table)
+
+
+def generate(path: Path = PATTERN_FILE, processes: int | None = None):
+    """
+    Build the pattern database and write it to `path`.
+    """
+    # Imported here rather than at the top, as the agent imports this module
+    # (but never builds the database) at startup
+    from multiprocessing import Pool
+    with Pool(processes) as pool:
+        tables = pool.map(_square_table, range(BOARD_N * BOARD_N))
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, len(WINDOW)))
+        for table in tables:
+            f.write(table)
+
+
+if __name__ == "__main__":
+    generate()
+    print(f"wrote {PATTERN_FILE}")
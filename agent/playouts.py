@@ -0,0 +1,151 @@
+# COMP30024 Artificial Intelligence, Semester 1 2025
+# Project Part B: Game Playing Agent
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from referee.game.constants import BOARD_N, MAX_TURNS
+
+from .bitboard import RED, BLUE, play, _STEPS, _HOPS
+
+PLAYOUTS_PER_MOVE = 64      # Playouts of each candidate root move
+
+# Cell codes of the uint8 boards
+EMPTY = 0
+RED_FROG = 1
+BLUE_FROG = 2
+LILY_PAD = 3
+
+# Rollout policy weights: moves are sampled with probability proportional to
+# their weight, which grows with the number of rows a move advances
+SIDEWAYS_WEIGHT = 1.0
+FORWARD_WEIGHT = 3.0        # Per row gained
+GROW_WEIGHT = 2.0
+
+_CELLS = BOARD_N * BOARD_N
+
+
+def available() -> bool:
+    return np is not None
+
+
+def _candidate_tables(side: int):
+    """
+    Every (start, jumped-over, destination) move a frog of the given side
+    could make with a step or a single hop, as parallel arrays, plus each
+    move's sampling weight. Steps have no jumped-over cell (-1).
+    """
+    starts, overs, dests, weights = [], [], [], []
+    for start in range(_CELLS):
+        for dest in _STEPS[side][start]:
+            starts.append(start); overs.append(-1); dests.append(dest)
+        for over, dest in _HOPS[side][start]:
+            starts.append(start); overs.append(over); dests.append(dest)
+    for start, dest in zip(starts, dests):
+        gain = (dest // BOARD_N - start // BOARD_N) * (1 if side == RED else -1)
+        weights.append(SIDEWAYS_WEIGHT + FORWARD_WEIGHT * gain)
+    weights.append(GROW_WEIGHT)     # The last candidate is a grow
+    return (np.array(starts), np.array(overs), np.array(dests),
+            np.array(weights, dtype=np.float32))
+
+
+_TABLES = [_candidate_tables(RED), _candidate_tables(BLUE)] \
+    if np is not None else None
+
+
+def _to_cells(red: int, blue: int, lily: int) -> 'np.ndarray':
+    bits = np.array([red, blue, lily], dtype=np.uint64)
+    cells = np.unpackbits(bits.view(np.uint8), bitorder='little') \
+        .reshape(3, _CELLS)
+    return (cells[0] * RED_FROG + cells[1] * BLUE_FROG
+            + cells[2] * LILY_PAD).astype(np.uint8)
+
+
+def run_playouts(boards: 'np.ndarray', side: int, turn: int,
+                 rng: 'np.random.Generator') -> 'np.ndarray':
+    """
+    Play a batch of games (a (batch, BOARD_N * BOARD_N) uint8 array of cell
+    codes, modified in place) to the end in lock-step, from `turn` turns
+    played with `side` to move. Each ply samples one move per board from its
+    steps, single hops and grow, weighted towards forward moves. Returns the
+    winner of each game: 1 for red, 2 for blue or 0 for a draw.
+    """
+    batch = len(boards)
+    rows = np.arange(batch)
+    active = np.ones(batch, dtype=bool)
+    grid = boards.reshape(batch, BOARD_N, BOARD_N)
+    padded = np.zeros((batch, BOARD_N + 2, BOARD_N + 2), dtype=bool)
+
+    while turn < MAX_TURNS:
+        own = RED_FROG if side == RED else BLUE_FROG
+        starts, overs, dests, weights = _TABLES[side]
+
+        # Legal candidate moves, then one weighted sample per board by
+        # inverting the cumulative weights of its legal candidates
+        legal = np.ones((batch, len(weights)), dtype=bool)
+        moves = legal[:, :-1]
+        moves &= boards[:, starts] == own
+        moves &= boards[:, dests] == LILY_PAD
+        over_cells = boards[:, overs]
+        moves &= (overs < 0) | (over_cells == RED_FROG) \
+            | (over_cells == BLUE_FROG)
+        cumulative = np.cumsum(legal * weights, axis=1)
+        u = rng.random(batch, dtype=np.float32) * cumulative[:, -1]
+        choice = np.minimum((cumulative <= u[:, None]).sum(axis=1),
+                            len(weights) - 1)
+
+        # Step and hop moves
+        moving = active & (choice < len(starts))
+        picked = choice[moving]
+        boards[rows[moving], starts[picked]] = EMPTY
+        boards[rows[moving], dests[picked]] = own
+
+        # Grows: every empty cell next to one of the player's frogs
+        growing = active & (choice == len(starts))
+        if growing.any():
+            frogs = grid[growing] == own
+            padded[:] = False
+            padded[growing, 1:-1, 1:-1] = frogs
+            near = np.zeros((batch, BOARD_N, BOARD_N), dtype=bool)
+            for dr in range(3):
+                for dc in range(3):
+                    near |= padded[:, dr:dr + BOARD_N, dc:dc + BOARD_N]
+            grid[near & (grid == EMPTY)] = LILY_PAD
+
+        turn += 1
+        side ^= 1
+        red_score = (boards[:, -BOARD_N:] == RED_FROG).sum(axis=1)
+        blue_score = (boards[:, :BOARD_N] == BLUE_FROG).sum(axis=1)
+        active &= (red_score < BOARD_N - 2) & (blue_score < BOARD_N - 2)
+        if not active.any():
+            break
+
+    red_score = (boards[:, -BOARD_N:] == RED_FROG).sum(axis=1)
+    blue_score = (boards[:, :BOARD_N] == BLUE_FROG).sum(axis=1)
+    return np.where(red_score > blue_score, RED_FROG,
+                    np.where(blue_score > red_score, BLUE_FROG, 0))
+
+
+def win_rates(red: int, blue: int, lily: int, side: int, turn: int,
+              root_moves: list[int],
+              playouts_per_move: int = PLAYOUTS_PER_MOVE,
+              seed: int | None = None) -> list[float]:
+    """
+    Estimate the chance of winning (counting draws as half) for `side`, the
+    player to move, after each of the given (packed) root moves, by playing
+    out all of them in one batch.
+    """
+    assert np is not None, "batched playouts require numpy"
+    rng = np.random.default_rng(seed)
+    starts = np.stack([
+        _to_cells(*play(red, blue, lily, side, move)) for move in root_moves
+    ])
+    boards = np.repeat(starts, playouts_per_move, axis=0)
+    winners = run_playouts(boards, side ^ 1, turn + 1, rng)
+
+    own = RED_FROG if side == RED else BLUE_FROG
+    results = np.where(winners == own, 1.0, np.where(winners == 0, 0.5, 0.0))
+    return results.reshape(len(root_moves), playouts_per_move) \
+        .mean(axis=1).tolist()
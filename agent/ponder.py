@@ -0,0 +1,104 @@
+# COMP30024 Artificial Intelligence, Semester 1 2025
+# Project Part B: Game Playing Agent
+
+import threading
+import time
+from dataclasses import dataclass
+
+from .evaluation import Evaluator, EvaluationCache
+from .search import PrincipalVariationSearch, SearchOptions
+from .tt import TranspositionTable, NO_MOVE
+
+PONDER_REPLIES = 3          # Opponent replies to ponder, most likely first
+PONDER_DEPTH = 16           # Iterative deepening limit per reply
+PONDER_MAX_NODES = 16000    # Node budget per reply
+
+
+@dataclass(frozen=True, slots=True)
+class PonderResult:
+    score: float
+    depth: int
+    pv: list[int]               # Packed moves with their paths
+
+
+class Ponderer:
+    """
+    Speculative search on a background thread while the opponent is thinking.
+    Starting from the position after our move, the opponent's likely replies
+    (the one predicted by our principal variation first) are each searched
+    from our point of view, and the results are kept by position key (see
+    `result`). The searches share the agent's transposition table, which is
+    left warm for whichever position actually arises.
+
+    The referee charges the agent for the CPU time of the whole process while
+    it is inside `action` or `update`, so pondering must be stopped when
+    either is called (see `stop`). The thread's own CPU time is accumulated
+    in `cpu_time`.
+    """
+    def __init__(
+        self,
+        tt: TranspositionTable | None,
+        evaluator: Evaluator | None = None,
+        eval_cache: EvaluationCache | None = None,
+        options: SearchOptions = SearchOptions(),
+        replies: int = PONDER_REPLIES,
+        max_nodes: int = PONDER_MAX_NODES,
+    ):
+        self._search = PrincipalVariationSearch(
+            options, tt=tt, evaluator=evaluator, eval_cache=eval_cache)
+        self._replies = replies
+        self._max_nodes = max_nodes
+        self._results: dict[int, PonderResult] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.cpu_time = 0.0
+
+    def start(self, root, predicted: int = NO_MOVE):
+        """
+        Start pondering from `root`, a position with the opponent to move,
+        given the (packed) reply predicted by our principal variation.
+        Results of any previous pondering are discarded.
+        """
+        self.stop()
+        self._results.clear()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(root, predicted), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop pondering and wait for the thread to finish.
+        """
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def result(self, key: int) -> PonderResult | None:
+        """
+        The pondered result for a position (with us to move), if any, given
+        its key in its own frame (`GameStateNode.zobrist_keys()[0]`) rather
+        than its canonical key: the PV is in the frame of the position that
+        was pondered, so a symmetric position must not match it.
+        """
+        return self._results.get(key)
+
+    def _run(self, root, predicted: int):
+        start = time.thread_time()
+        try:
+            # Most likely replies first: the predicted one, then those which
+            # leave us with the lowest static score
+            replies = sorted(root.children(), key=lambda child: (
+                child.move != predicted, child.evaluate()))
+            for reply in replies[:self._replies]:
+                score, _ = self._search.search(
+                    reply, PONDER_DEPTH, self._max_nodes,
+                    should_stop=self._stop.is_set)
+                if self._search.depth > 0:
+                    self._results[reply.zobrist_keys()[0]] = PonderResult(
+                        score, self._search.depth, self._search.pv)
+                if self._stop.is_set():
+                    break
+        finally:
+            self.cpu_time += time.thread_time() - start
@@ -1,134 +1,362 @@
 # COMP30024 Artificial Intelligence, Semester 1 2025
 # Project Part B: Game Playing Agent
 
+import os
+
 from referee.game import PlayerColor, Coord, Direction, \
     Action, MoveAction, GrowAction
+from referee.game.constants import BOARD_N, MAX_TURNS
+
+from .bitboard import RED, from_sets, side_index, moves, play, to_action, \
+    search_moves
+from .book import OpeningBook
+from .evaluation import Evaluator, EvaluationCache
+from .patterns import PatternDatabase
+from .race import RaceSolver, is_race
+from .search import PrincipalVariationSearch
+from .store import PositionStore, Harvest
+from .tt import TranspositionTable, board_keys, canonical, encode_move, \
+    transform_move, move_squares, with_path, move_action, EXACT, NO_MOVE, \
+    GROW_MOVE, MOVE_MASK, PATH_SHIFT
+
+MAX_DEPTH = 3
+PVS_DEPTH = 16          # Iterative deepening limit for PVS
+PVS_MAX_NODES = 4000    # Node budget per action for PVS
+SEARCHES = ("pvs", "mcts", "playouts", "minimax")   # See Agent.__init__
+
+_ROW_SUMS = Evaluator.default(None)      # For nodes given no evaluator
+
+_COORDS = [Coord(r, c) for r in range(BOARD_N) for c in range(BOARD_N)]
 
 class GameStateNode:
     def __init__(self, red_frogs, blue_frogs, lily_pads,
-                 isMax, color, name=None, depth=0, max_depth=2):
+                 isMax, color, depth=0, max_depth=2,
+                 move=NO_MOVE, path=0, evaluator=None, eval_cache=None):
         self.red_frogs = set(red_frogs)
         self.blue_frogs = set(blue_frogs)
         self.lily_pads = set(lily_pads)
         self.isMax = isMax            
         self.color = color            
-        self.name = name              
         self.depth = depth
         self.max_depth = max_depth
+        self.move = move              # packed move leading here (see tt.py)
+        self.path = path              # and its path, to build `name`
+        # The agent's evaluator and evaluation cache, passed down the tree
+        self.evaluator = evaluator if evaluator is not None else _ROW_SUMS
+        self.eval_cache = eval_cache
+        self._keys = None             # Zobrist keys under each symmetry
+        self._key = None
+        self._symmetry = 0
+        self._masks = None
+        self._score = None            # evaluation, from red's perspective
+
 
+    @property
+    def name(self) -> Action | None:
+        """
+        The action leading to this node, built (only) when asked for.
+        """
+        if self.move == NO_MOVE:
+            return None
+        return move_action(with_path(self.move, self.path))
 
     def isLeaf(self):
         return self.depth >= self.max_depth
 
     def evaluate(self):
-        red_progress = sum(f.r for f in self.red_frogs)
-        blue_progress = sum(7 - f.r for f in self.blue_frogs)
+        if self._score is None:
+            cache = self.eval_cache
+            if cache is None or not self._cached_score(cache):
+                self._score = self.evaluator.evaluate(*self.bitboards())
+                if cache is not None:
+                    cache.store(self.zobrist_keys()[0], self._score)
         if self.color == PlayerColor.RED:
-            return red_progress - blue_progress
+            return self._score
         else:
-            return blue_progress - red_progress
+            return -self._score
+
+    def _cached_score(self, cache: EvaluationCache) -> bool:
+        # Take the score from the evaluation cache (keyed, like the searches'
+        # static evaluations, by the position's key in its own frame)
+        score = cache.probe(self.zobrist_keys()[0])
+        if score is None:
+            return False
+        self._score = score
+        return True
+
+    def zobrist_keys(self) -> tuple[int, ...]:
+        """
+        Zobrist hashes of this position under each symmetry (see
+        `tt.board_keys`).
+        """
+        if self._keys is None:
+            self._keys = board_keys(*self.bitboards(),
+                                    side_index(self.active_color()))
+        return self._keys
+
+    def key(self) -> int:
+        """
+        Canonical Zobrist hash of this position (including the player to
+        move), the same for positions equivalent under symmetry.
+        """
+        if self._key is None:
+            self._key, self._symmetry = canonical(self.zobrist_keys())
+        return self._key
+
+    def symmetry(self) -> int:
+        """
+        The symmetry mapping this position to its canonical frame (see
+        `tt.SYMMETRIES`), e.g. for moves stored under the canonical key.
+        """
+        self.key()
+        return self._symmetry
+
+    def active_color(self) -> PlayerColor:
+        """
+        The colour of the player to move at this node.
+        """
+        return self.color if self.isMax else self.color.opponent
+
+    def bitboards(self) -> tuple[int, int, int]:
+        """
+        The (red, blue, lily) masks of this position (see bitboard.py).
+        """
+        if self._masks is None:
+            self._masks = from_sets(self.red_frogs, self.blue_frogs,
+                                    self.lily_pads)
+        return self._masks
 
     def children(self):
-        children = []
-        active = self.color if self.isMax else (
-            PlayerColor.BLUE if self.color == PlayerColor.RED else PlayerColor.RED
-        )
-        frogs = self.red_frogs if active == PlayerColor.RED else self.blue_frogs
-
-        if active == PlayerColor.RED:
-            allowed_dirs = {Direction.Right, Direction.Left,
-                            Direction.Down, Direction.DownLeft, Direction.DownRight}
-        else:
-            allowed_dirs = {Direction.Right, Direction.Left,
-                            Direction.Up, Direction.UpLeft, Direction.UpRight}
-        all_frogs = self.red_frogs | self.blue_frogs
-
-        # 1-step moves
-        for frog in frogs:
-            for d in allowed_dirs:
-                dest = apply_direction(frog, d)
-                if dest and dest in self.lily_pads and dest not in all_frogs:
-                    action = MoveAction(frog, [d])
-                    new_red = set(self.red_frogs)
-                    new_blue = set(self.blue_frogs)
-                    new_lilies = set(self.lily_pads)
-                    # remove lily pad at start
-                    new_lilies.discard(frog)
-                    # move frog
-                    if active == PlayerColor.RED:
-                        new_red.discard(frog); new_red.add(dest)
-                    else:
-                        new_blue.discard(frog); new_blue.add(dest)
-                    children.append(
-                        GameStateNode(new_red, new_blue, new_lilies,
-                                      not self.isMax, self.color,
-                                      name=action, depth=self.depth+1,
-                                      max_depth=self.max_depth)
-                    )
-
-        jumps = []
-        for frog in frogs:
-            paths = find_jumps(frog, frog, allowed_dirs, all_frogs, self.lily_pads, {frog}, jumps)
-            for path in paths:
-                current = frog
-                for d in path:
-                    over = apply_direction(current, d)
-                    current = apply_direction(over, d)
-
-                action = MoveAction(frog, path)
-                new_red = set(self.red_frogs)
-                new_blue = set(self.blue_frogs)
-                new_lilies = set(self.lily_pads)
-                new_lilies.discard(frog)
-                if active == PlayerColor.RED:
-                    new_red.discard(frog); new_red.add(current)
-                else:
-                    new_blue.discard(frog); new_blue.add(current)
-
-                children.append(
-                    GameStateNode(new_red, new_blue, new_lilies,
-                                  not self.isMax, self.color,
-                                  name=action, depth=self.depth+1,
-                                  max_depth=self.max_depth)
-                )
-
-        action = GrowAction()
+        active = self.active_color()
+        side = side_index(active)
+        return [self._child(active, move)
+                for move in search_moves(*self.bitboards(), side, [])]
+
+    def _child(self, active: PlayerColor, move: int) -> 'GameStateNode':
+        # The child reached by a packed move (carrying its path)
         new_red = set(self.red_frogs)
         new_blue = set(self.blue_frogs)
         new_lilies = set(self.lily_pads)
-        frogs_to_grow = new_red if active == PlayerColor.RED else new_blue
-        for f in frogs_to_grow:
-            for adj in adjacent_coords(f):
-                new_lilies.add(adj)
-        children.append(
-            GameStateNode(new_red, new_blue, new_lilies,
-                          not self.isMax, self.color,
-                          name=action, depth=self.depth+1,
-                          max_depth=self.max_depth)
-        )
-
-        return children
+        if move == GROW_MOVE:
+            frogs_to_grow = new_red if active == PlayerColor.RED else new_blue
+            for f in frogs_to_grow:
+                for adj in adjacent_coords(f):
+                    new_lilies.add(adj)
+        else:
+            start, dest = move_squares(move)
+            frog = _COORDS[start]
+            landing = _COORDS[dest]
+            # remove lily pad at start
+            new_lilies.discard(frog)
+            # move frog
+            if active == PlayerColor.RED:
+                new_red.discard(frog); new_red.add(landing)
+            else:
+                new_blue.discard(frog); new_blue.add(landing)
+        child = GameStateNode(new_red, new_blue, new_lilies,
+                              not self.isMax, self.color,
+                              depth=self.depth+1,
+                              max_depth=self.max_depth,
+                              move=move & MOVE_MASK,
+                              path=move >> PATH_SHIFT,
+                              evaluator=self.evaluator,
+                              eval_cache=self.eval_cache)
+        child._masks = play(*self.bitboards(), side_index(active), move)
+        return child
 
 class Agent:
-    def __init__(self, color: PlayerColor, **referee: dict):
+    def __init__(self, color: PlayerColor, search: str = "pvs",
+                 workers: int = 0, ponder: bool = False,
+                 harvest: str | None = None, max_nodes: int = PVS_MAX_NODES,
+                 **referee: dict):
+        """
+        `search` selects the search algorithm: "pvs" for principal variation
+        search with iterative deepening, "mcts" for Monte Carlo tree search,
+        "playouts" for flat Monte Carlo with batched NumPy playouts, or
+        "minimax" for plain alpha-beta; any other name raises ValueError.
+        With PVS, `workers` > 0 starts that many helper processes for lazy
+        SMP parallel search (sharing the transposition table), and `ponder`
+        enables searching the opponent's likely replies in a background
+        thread during their turn. PVS searches at most `max_nodes` nodes per
+        action.
+
+        Deep results from earlier games are read from the position store, if
+        one has been built (see store.py); given a `harvest` path, the
+        results of this game's searches are appended to it for merging.
+        """
+        if search not in SEARCHES:
+            raise ValueError(f"unknown search {search!r} "
+                             f"(expected one of {', '.join(SEARCHES)})")
+        # The modules of the other search modes (and the multiprocessing and
+        # threading modules they use) are only imported when selected, as the
+        # referee counts the agent's imports against its time
+        if search == "playouts":
+            from . import playouts
+            if not playouts.available():
+                raise ImportError("playouts search requires numpy")
         self._color = color
+        self._search = search
+        self._max_nodes = max_nodes
+        self._evaluator = Evaluator.load(PatternDatabase.open())
+        self._eval_cache = EvaluationCache(
+            EvaluationCache.entries_for(referee.get("space_limit")))
+        self._turn_count = 0
+        self._book = OpeningBook.open()
+        self._race = RaceSolver()
+        self._pool = None
+        self._mcts = None
+        if search == "mcts":
+            from .mcts import MonteCarloTreeSearch
+            self._mcts = MonteCarloTreeSearch(
+                MonteCarloTreeSearch.capacity_for(referee.get("space_limit")))
+        if search == "pvs" and workers > 0:
+            from .parallel import LazySMPPool
+            self._pool = LazySMPPool(workers,
+                                     weights=self._evaluator.weights)
+            tt = self._pool.tt
+        else:
+            tt = TranspositionTable()
+        self._tt = tt
+        self._store = PositionStore.open()
+        self._harvest = Harvest(harvest) if harvest is not None else None
+        self._pvs = PrincipalVariationSearch(
+            tt=tt, store=self._store, evaluator=self._evaluator,
+            eval_cache=self._eval_cache)
+        self._line: list[int] = []      # Expected continuation (packed)
+        self._ponderer = None
+        self._predicted = NO_MOVE
+        if ponder and search == "pvs" and self._pool is None:
+            from .ponder import Ponderer
+            self._ponderer = Ponderer(tt, self._evaluator, self._eval_cache)
         self.red_frogs  = {Coord(0, i) for i in range(1,7)}
         self.blue_frogs = {Coord(7, i) for i in range(1,7)}
         self.lily_pads  = {Coord(0,0), Coord(0,7), *{Coord(1,c) for c in range(1,7)},
                            *{Coord(6,c) for c in range(1,7)}, Coord(7,0), Coord(7,7)}
 
     def action(self, **referee: dict) -> Action:
-        MAX_DEPTH = 3
+        book_move = self._book_move()
+        if book_move is not None:
+            return book_move
+
+        race_move = self._race_move()
+        if race_move is not None:
+            return race_move
+
+        if self._mcts is not None:
+            from .mcts import MCTS_PLAYOUTS
+            return self._mcts.search(
+                *from_sets(self.red_frogs, self.blue_frogs, self.lily_pads),
+                side_index(self._color), self._turn_count, MCTS_PLAYOUTS)
+        if self._search == "playouts":
+            return self._best_playout_move()
+
         root = GameStateNode(self.red_frogs, self.blue_frogs, self.lily_pads,
                               isMax=True, color=self._color,
-                              name=None, depth=0, max_depth=MAX_DEPTH)
+                              depth=0, max_depth=MAX_DEPTH,
+                              evaluator=self._evaluator,
+                              eval_cache=self._eval_cache)
+        if self._pool is not None:
+            _, best_move = self._pool.search(self._pvs, root, PVS_DEPTH,
+                                             self._max_nodes, pv=self._line)
+            self._line = self._pvs.pv
+            return best_move or GrowAction()
+        if self._search == "pvs":
+            pv = self._line
+            if self._ponderer is not None:
+                self._ponderer.stop()
+                pondered = self._ponderer.result(
+                    root.zobrist_keys()[0])
+                if pondered is not None:
+                    pv = pondered.pv
+            start_depth = 1
+            stored = self._stored_result(root)
+            if stored is not None:
+                # Resume deepening from the stored result
+                depth, stored_move = stored
+                if depth >= PVS_DEPTH:
+                    return move_action(stored_move)
+                start_depth, pv = depth + 1, [stored_move]
+            _, best_move = self._pvs.search(root, PVS_DEPTH, self._max_nodes,
+                                            start_depth=start_depth, pv=pv)
+            if self._harvest is not None and self._pvs.depth > 0:
+                entry = self._tt.probe(root.key())
+                if entry is not None:
+                    self._harvest.record(root.key(), entry)
+            # Our PV's second move is the opponent's predicted reply
+            self._line = self._pvs.pv
+            self._predicted = self._line[1] & MOVE_MASK \
+                if len(self._line) > 1 else NO_MOVE
+            return best_move or GrowAction()
+
         _, best = minimax_alpha_beta(root, float('-inf'), float('inf'))
         if best:
             best_move = best[0]   
             return best_move
         return GrowAction()
 
+    def _book_move(self) -> Action | None:
+        """
+        The opening book's move for the current position, if it has one.
+        """
+        if self._book is None or self._turn_count >= self._book.plies:
+            return None
+        position = from_sets(self.red_frogs, self.blue_frogs, self.lily_pads)
+        side = side_index(self._color)
+        move = self._book.lookup(*position, side)
+        if move not in moves(*position, side):
+            return None     # No entry (or, improbably, a key collision)
+        # The searches' expected line does not cover book moves
+        self._line = []
+        self._predicted = NO_MOVE
+        return to_action(*position, side, move)
+
+    def _stored_result(self, root) -> tuple[int, int] | None:
+        """
+        The depth and best move (packed, with its path) of an exact result
+        for the root position in the position store, if it has one.
+        """
+        if self._store is None:
+            return None
+        entry = self._store.probe(root.key())
+        if entry is None or entry.bound != EXACT or entry.move == NO_MOVE:
+            return None
+        move = transform_move(entry.move, root.symmetry())
+        side = side_index(root.active_color())
+        for candidate in search_moves(*root.bitboards(), side, []):
+            if candidate & MOVE_MASK == move:
+                return entry.depth, candidate
+        return None
+
+    def _race_move(self) -> Action | None:
+        """
+        The optimal move if the game has become a pure race to the goal rows
+        (and the race can finish before the turn limit), else None.
+        """
+        red, blue, lily = from_sets(self.red_frogs, self.blue_frogs,
+                                    self.lily_pads)
+        if not is_race(red, blue):
+            return None
+        side = side_index(self._color)
+        solved = self._race.solve(red if side == RED else blue, lily, side)
+        turns_left = (MAX_TURNS - self._turn_count + 1) // 2
+        if solved is None or solved[1] is None or solved[0] > turns_left:
+            return None
+        return to_action(red, blue, lily, side, solved[1])
+
+    def _best_playout_move(self) -> Action:
+        from . import playouts
+        position = from_sets(self.red_frogs, self.blue_frogs, self.lily_pads)
+        side = side_index(self._color)
+        root_moves = moves(*position, side)
+        rates = playouts.win_rates(*position, side, self._turn_count,
+                                   root_moves)
+        best = max(range(len(root_moves)), key=lambda i: rates[i])
+        return to_action(*position, side, root_moves[best])
+
     def update(self, color: PlayerColor, action: Action, **referee: dict):
+        if self._ponderer is not None:
+            self._ponderer.stop()
+
         if isinstance(action, MoveAction):
             current = action.coord
             for direction in action.directions:
@@ -137,6 +365,7 @@ class Agent:
                     current = apply_direction(current, direction)
             
             destination = current
+            move = encode_move(action.coord, destination)
             
             self.lily_pads.discard(action.coord)
 
@@ -148,15 +377,70 @@ class Agent:
                 self.blue_frogs.add(destination)
 
         elif isinstance(action, GrowAction):
+            move = GROW_MOVE
             frogs = self.red_frogs if color == PlayerColor.RED else self.blue_frogs
             for frog in frogs:
                 for adj in adjacent_coords(frog):
                     self.lily_pads.add(adj)        
             
+        self._turn_count += 1
+        if self._mcts is not None:
+            self._mcts.advance(move)
+
+        # Follow the played move along the expected line, so that the rest of
+        # it orders the next search; and age (rather than clear) what was
+        # learned on earlier turns
+        if self._line and self._line[0] & MOVE_MASK == move:
+            self._line = self._line[1:]
+        else:
+            self._line = []
+        if color == self._color:
+            self._tt.new_generation()
+            self._pvs.age_history()
+        if self._ponderer is not None and color == self._color:
+            # Ponder while the opponent thinks (outside the referee's timer)
+            self._ponderer.start(
+                GameStateNode(self.red_frogs, self.blue_frogs, self.lily_pads,
+                              isMax=False, color=self._color,
+                              max_depth=MAX_DEPTH, evaluator=self._evaluator,
+                              eval_cache=self._eval_cache),
+                self._predicted)
         
         self.frogs = self.red_frogs if self._color == PlayerColor.RED else self.blue_frogs
         self.opponent_frogs = self.blue_frogs if self._color == PlayerColor.RED else self.red_frogs    
 
+class ParallelAgent(Agent):
+    """
+    Agent using lazy SMP parallel search with a helper process for every
+    other available CPU core (select with e.g. `agent:ParallelAgent`).
+    """
+    def __init__(self, color: PlayerColor, **referee: dict):
+        super().__init__(color, workers=max(1, (os.cpu_count() or 2) - 1),
+                         **referee)
+
+class MCTSAgent(Agent):
+    """
+    Agent using Monte Carlo tree search (select with `agent:MCTSAgent`).
+    """
+    def __init__(self, color: PlayerColor, **referee: dict):
+        super().__init__(color, search="mcts", **referee)
+
+class PonderingAgent(Agent):
+    """
+    Agent using PVS with pondering on the opponent's turn (select with
+    `agent:PonderingAgent`).
+    """
+    def __init__(self, color: PlayerColor, **referee: dict):
+        super().__init__(color, ponder=True, **referee)
+
+class PlayoutAgent(Agent):
+    """
+    Agent choosing moves by batched random playouts (requires numpy; select
+    with `agent:PlayoutAgent`).
+    """
+    def __init__(self, color: PlayerColor, **referee: dict):
+        super().__init__(color, search="playouts", **referee)
+
 def adjacent_coords(coord: Coord) -> list[Coord]:
     directions = [
         (-1, -1), (-1, 0), (-1, 1),
@@ -192,32 +476,6 @@ def print_board(red_frogs, blue_frogs, lily_pads):
         print(" ".join(row))
     print()
 
-def find_jumps(start: Coord, current: Coord, directions: set[Direction], frogs: set[Coord], lily_pads: set[Coord], visited: set[Coord], path: list[Direction]):
-    all_paths = []
-
-    for direction in directions:
-        over = apply_direction(current, direction)
-        dest = apply_direction(over, direction) if over else None
-
-        if (
-            dest and
-            over in frogs and
-            dest in lily_pads and
-            dest not in frogs and
-            dest not in visited
-        ):
-            new_path = path + [direction]
-            next_lilypads = lily_pads - {current}
-            next_frogs = (frogs - {current}) | {dest}
-
-            extended_paths = find_jumps(start, dest, directions, next_frogs, next_lilypads, visited | {dest}, new_path)
-            if extended_paths:
-                all_paths.extend(extended_paths)
-            else:
-                all_paths.append(new_path)
-
-    return all_paths
-
 # The code below is taken wholesale from 
 # Artificial Intelligence: Foundations of Computational Agents https://artint.info
 # Copyright 2017-2024 David L. Poole and Alan K. Mackworth
@@ -0,0 +1,129 @@
+# COMP30024 Artificial Intelligence, Semester 1 2025
+# Project Part B: Game Playing Agent
+
+from heapq import heappush, heappop
+
+from referee.game.constants import BOARD_N
+
+from .bitboard import RED, FULL_MASK, ROW_MASKS, GOAL_MASKS, moves, play
+
+RACE_MAX_NODES = 20000      # Positions expanded per solve before giving up
+
+
+def is_race(red: int, blue: int) -> bool:
+    """
+    Whether the frogs can no longer interact: every red frog is at least two
+    rows past every blue frog. Frogs never move backwards, so from then on
+    neither side can jump over the other's frogs, nor reach a lily pad the
+    other can grow or use, and each side is racing alone to its goal row.
+    """
+    if not red or not blue:
+        return False
+    red_rear = next(r for r in range(BOARD_N) if red & ROW_MASKS[r])
+    blue_rear = next(r for r in reversed(range(BOARD_N))
+                     if blue & ROW_MASKS[r])
+    return red_rear >= blue_rear + 2
+
+
+def race_region(own: int, side: int) -> int:
+    """
+    The cells a side's frogs `own` can still reach: the rows from its
+    rearmost frog forward, as frogs never move backwards. Lily pads outside
+    the region make no difference to a race, so they are left out of the
+    positions the solver memoises, and a position's key stays the same from
+    one turn to the next.
+    """
+    if side == RED:
+        rear = ((own & -own).bit_length() - 1) // BOARD_N
+        return FULL_MASK ^ ((1 << rear * BOARD_N) - 1)
+    rear = (own.bit_length() - 1) // BOARD_N
+    return (1 << (rear + 1) * BOARD_N) - 1
+
+
+class RaceSolver:
+    """
+    Exact solver for one side's race to its goal row: the minimum number of
+    its own turns (steps, jumps over its own frogs, and grows) needed to get
+    every frog onto the goal row, found by A* search with the number of frogs
+    still off the goal row as an (admissible) heuristic.
+
+    Every position on a solved line is memoised with its distance and best
+    move, so that later turns of the same race are answered immediately.
+    """
+    def __init__(self, max_nodes: int = RACE_MAX_NODES):
+        self._max_nodes = max_nodes
+        self._memo: dict[tuple[int, int, int], tuple[int, int]] = {}
+        self.nodes = 0
+
+    def solve(self, own: int, lily: int, side: int) -> tuple[int, int] | None:
+        """
+        The minimum number of turns for the side with frogs `own` to fill its
+        goal row, and the (packed) first move of a shortest line; or None if
+        the search exceeds its node budget.
+        """
+        start = (own, lily & race_region(own, side), side)
+        if start in self._memo:
+            return self._memo[start]
+
+        goal = GOAL_MASKS[side]
+        frogs = own.bit_count()
+        parents: dict[tuple[int, int, int], tuple | None] = {start: None}
+        distance = {start: 0}
+        # Entries are (f, -g, tiebreak, state, solved): ties favour deeper
+        # positions, and a `solved` entry's f is its exact total distance
+        queue = [(frogs - (own & goal).bit_count(), 0, 0, start, False)]
+        pushed = 1
+        self.nodes = 0
+        while queue:
+            f, neg_g, _, state, solved = heappop(queue)
+            if solved or state[0] & goal == state[0]:
+                return self._record(state, parents)
+            g = -neg_g
+            if g > distance[state]:
+                continue    # Reached more cheaply since this was pushed
+            if state in self._memo:
+                # The rest of the line is known, but may be longer than the
+                # heuristic promised, so queue it at its true length
+                total = g + self._memo[state][0]
+                heappush(queue, (total, -total, pushed, state, True))
+                pushed += 1
+                continue
+
+            self.nodes += 1
+            if self.nodes > self._max_nodes:
+                return None
+            own, lily, _ = state
+            position = (own, 0) if side == RED else (0, own)
+            for move in moves(*position, lily, side):
+                red, blue, child_lily = play(*position, lily, side, move)
+                child_own = red if side == RED else blue
+                child = (child_own,
+                         child_lily & race_region(child_own, side), side)
+                if child in distance and distance[child] <= g + 1:
+                    continue
+                distance[child] = g + 1
+                parents[child] = (state, move)
+                h = frogs - (child_own & goal).bit_count()
+                heappush(queue, (g + 1 + h, -(g + 1), pushed, child, False))
+                pushed += 1
+        return None
+
+    def _record(self, end: tuple[int, int, int],
+                parents: dict) -> tuple[int, int]:
+        """
+        Memoise every position on the line found to `end`, returning the
+        result for the first.
+        """
+        if end in self._memo:
+            remaining, last_move = self._memo[end]
+        else:
+            remaining, last_move = 0, None
+            self._memo[end] = (0, None)
+        state, result = end, (remaining, last_move)
+        while parents[state] is not None:
+            parent, move = parents[state]
+            remaining += 1
+            result = (remaining, move)
+            self._memo[parent] = result
+            state = parent
+        return result
@@ -0,0 +1,525 @@
+# COMP30024 Artificial Intelligence, Semester 1 2025
+# Project Part B: Game Playing Agent
+
+from dataclasses import dataclass
+from typing import Callable
+
+from referee.game import Action
+
+from .bitboard import RED, side_index, search_moves, jump_moves, step_moves, \
+    forward_hop_landings, play, move_gain
+from .evaluation import Evaluator, EvaluationCache, SCORE_SCALE
+from .store import PositionStore
+from .tt import TranspositionTable, EXACT, LOWER, UPPER, NO_MOVE, \
+    MOVE_MASK, board_keys, played_keys, side_keys, toggle, canonical, \
+    transform_move, move_action
+
+MAX_PLY = 32            # Deepest ply the PV table can hold
+HISTORY_SIZE = 1 << 13  # One history counter per packed move
+STOP_CHECK_INTERVAL = 256   # Nodes between checks of an external stop signal
+
+INF = float('inf')
+
+
+@dataclass(frozen=True, slots=True)
+class SearchOptions:
+    """
+    Tunable switches and parameters for `PrincipalVariationSearch`.
+    """
+    # Half-width of the aspiration window (score units, see SCORE_SCALE)
+    aspiration_window: float = 2 * SCORE_SCALE
+
+    # Quiescence search over forward jumps at the horizon
+    quiescence: bool = True
+    qs_max_depth: int = 2           # Deepest extension past the horizon
+    qs_delta_margin: float = SCORE_SCALE    # Slack added to a jump's gain
+
+    # Null-move pruning: let the player to move pass (which is close to a
+    # grow in Freckers) and prune if a reduced search still fails high
+    null_move: bool = True
+    null_move_reduction: int = 2
+    null_move_min_depth: int = 2
+
+    # Late-move reductions for quiet moves ordered late
+    lmr: bool = True
+    lmr_min_depth: int = 2
+    lmr_min_moves: int = 2          # Moves searched at full depth first
+    lmr_reduction: int = 1
+    lmr_late_moves: int = 6         # Moves after which to reduce one more
+
+    # Futility pruning of quiet moves near the horizon, with a margin per
+    # remaining ply of depth
+    futility: bool = True
+    futility_depth: int = 2
+    futility_margin: float = SCORE_SCALE
+
+
+class SearchAborted(Exception):
+    """Raised inside the search when the node budget runs out."""
+
+
+class PrincipalVariationSearch:
+    """
+    Iterative deepening negamax search with principal variation search (PVS).
+    Only the first (expected best) move at each position is searched with a
+    full window; the rest are searched with a null window and only
+    re-searched if they turn out to be better. Each iteration starts from an
+    aspiration window around the previous iteration's score, and searches
+    the previous principal variation first.
+
+    The root is given as a `GameStateNode`, but below it positions are only
+    bitboards and their Zobrist keys (see bitboard.py and tt.py), passed down
+    the recursion. Each ply has a preallocated buffer for its moves, packed
+    as integers with their paths (see `tt.with_path`), and a parallel buffer
+    of their ordering gains. A move is only played, and its position's keys
+    updated, when it is searched, and only the best move at the root is made
+    into an `Action`.
+
+    The principal variation is kept in a preallocated triangular table: row
+    `ply` holds the best line found from that ply onwards, in columns `ply` to
+    `pv_length[ply] - 1`.
+
+    If a transposition table is given, results are stored in (and cut off or
+    ordered by) it; the table may be shared with other searches, including
+    ones running in other processes. A read-only position store of deep
+    results from earlier games (see store.py) may also be given; it is
+    probed whenever the transposition table has no entry for a position.
+    Positions are scored by the given evaluator (the default weights if
+    none), through the given evaluation cache if any.
+
+    Moves are ordered after any PV or transposition table move by their gain
+    (ties broken by the history heuristic: how often, and how deep, each move
+    caused a cutoff). At frontier nodes, whose children are leaves, the
+    children are evaluated together, as one batch, and a move's gain is the
+    change in its player's static score; elsewhere it is the number of rows
+    the move advances. History is kept between searches, and halved by
+    `age_history` so that it favours recent turns.
+
+    On top of full-width PVS, the selective techniques enabled in
+    `SearchOptions` (quiescence, null-move pruning, late-move reductions and
+    futility pruning) spend fewer nodes on moves which are unlikely to matter.
+    """
+    def __init__(
+        self,
+        options: SearchOptions = SearchOptions(),
+        max_ply: int = MAX_PLY,
+        tt: TranspositionTable | None = None,
+        store: PositionStore | None = None,
+        evaluator: Evaluator | None = None,
+        eval_cache: EvaluationCache | None = None,
+    ):
+        self._options = options
+        self._tt = tt
+        self._store = store
+        self._evaluator = evaluator if evaluator is not None \
+            else Evaluator.default(None)
+        self._eval_cache = eval_cache
+        self._max_ply = max_ply
+        self._pv_table: list[list[int]] = \
+            [[NO_MOVE] * max_ply for _ in range(max_ply)]
+        self._pv_length = [0] * max_ply
+        self._prev_pv: list[int] = [NO_MOVE] * max_ply
+        self._move_lists: list[list[int]] = [[] for _ in range(max_ply)]
+        self._gain_lists: list[list[int]] = [[] for _ in range(max_ply)]
+        self._prev_pv_length = 0
+        self._max_nodes: int | None = None
+        self._should_stop: Callable[[], bool] | None = None
+        self._history = [0] * HISTORY_SIZE
+        self._root_side = RED
+        self.nodes = 0
+        self.depth = 0
+
+    @property
+    def options(self) -> SearchOptions:
+        return self._options
+
+    @property
+    def pv(self) -> list[int]:
+        """
+        The principal variation found by the last completed iteration, as
+        packed moves with their paths (see `tt.move_action`).
+        """
+        return self._prev_pv[:self._prev_pv_length]
+
+    def age_history(self):
+        """
+        Halve every history counter (e.g. between turns).
+        """
+        self._history = [count >> 1 for count in self._history]
+
+    def search(
+        self,
+        root,
+        max_depth: int,
+        max_nodes: int | None = None,
+        start_depth: int = 1,
+        should_stop: Callable[[], bool] | None = None,
+        pv: list[int] | None = None,
+    ) -> tuple[float, Action | None]:
+        """
+        Search the root node to `max_depth` plies, returning the score (from
+        the root player's perspective) and the best action found. If a node
+        budget is given, deepening stops once it is spent, and the result of
+        the deepest completed iteration is returned. The search is also
+        abandoned as soon as `should_stop` (polled periodically) returns True.
+        A principal variation from an earlier search of the same root may be
+        given to order the first iteration's moves.
+
+        Deepening starts at `start_depth`. The first iteration always runs to
+        completion when it starts from depth 1; when it resumes from an
+        earlier result (e.g. from the position store) the budget applies
+        throughout, and if no iteration completes, the given PV's first move
+        is returned (with a score of None).
+        """
+        self.nodes = 0
+        self.depth = 0
+        self._prev_pv_length = 0
+        for move in (pv or [])[:self._max_ply]:
+            self._prev_pv[self._prev_pv_length] = move
+            self._prev_pv_length += 1
+        self._max_nodes = None if start_depth <= 1 else max_nodes
+        self._should_stop = should_stop
+        # Sides alternate with every ply (a null move included), so the side
+        # to move at a ply follows from the root's
+        self._root_side = side_index(root.active_color())
+        red, blue, lily = root.bitboards()
+        keys = board_keys(red, blue, lily, self._root_side)
+        score = None
+        for depth in range(start_depth, max_depth + 1):
+            try:
+                score = self._aspiration_search(red, blue, lily, keys, depth,
+                                                score)
+            except SearchAborted:
+                break
+            finally:
+                # The first iteration always runs to completion
+                self._max_nodes = max_nodes
+
+            # Keep this iteration's PV to order the next iteration's moves
+            row = self._pv_table[0]
+            for i in range(self._pv_length[0]):
+                self._prev_pv[i] = row[i]
+            self._prev_pv_length = self._pv_length[0]
+            self.depth = depth
+
+        best = self._prev_pv[0] if self._prev_pv_length > 0 else NO_MOVE
+        return score, move_action(best) if best != NO_MOVE else None
+
+    def _aspiration_search(self, red: int, blue: int, lily: int,
+                           keys: tuple[int, ...], depth: int,
+                           guess: float | None):
+        if guess is None:
+            return self._pvs(red, blue, lily, keys, depth, -INF, INF, 0,
+                             True, False)
+
+        window = self._options.aspiration_window
+        alpha, beta = guess - window, guess + window
+        while True:
+            score = self._pvs(red, blue, lily, keys, depth, alpha, beta, 0,
+                              True, False)
+            if score <= alpha:
+                alpha = -INF
+            elif score >= beta:
+                beta = INF
+            else:
+                return score
+
+    def _pvs(self, red: int, blue: int, lily: int, keys: tuple[int, ...],
+             depth: int, alpha: float, beta: float, ply: int,
+             follow_pv: bool, allow_null: bool = True,
+             static: int | None = None) -> float:
+        # `static` is the position's static score, if the caller knows it
+        self._count_node()
+        self._pv_length[ply] = ply
+        options = self._options
+        side = self._root_side ^ ply & 1
+        if static is None:
+            static = self._static_score(red, blue, lily, keys, side)
+
+        if depth <= 0 or ply >= self._max_ply - 1:
+            if options.quiescence:
+                return self._quiescence_search(red, blue, lily, keys, alpha,
+                                               beta, ply, 0, True, static)
+            return static
+
+        pv_node = beta - alpha > 1
+        key, symmetry = canonical(keys)
+
+        tt_move = NO_MOVE
+        entry = self._tt.probe(key) if self._tt is not None else None
+        if entry is None and self._store is not None:
+            entry = self._store.probe(key)
+        if entry is not None:
+            # Stored moves are in the position's canonical frame
+            tt_move = transform_move(entry.move, symmetry)
+            if entry.depth >= depth and not pv_node and (
+                entry.bound == EXACT or
+                (entry.bound == LOWER and entry.score >= beta) or
+                (entry.bound == UPPER and entry.score <= alpha)
+            ):
+                return entry.score
+        alpha_orig = alpha
+
+        # Null-move pruning: if passing still fails high after a reduced
+        # search, a real move almost certainly would too
+        if options.null_move and allow_null and not pv_node \
+                and depth >= options.null_move_min_depth and static >= beta:
+            score = -self._pvs(red, blue, lily, toggle(keys, side_keys()),
+                depth - 1 - options.null_move_reduction,
+                -beta, -beta + 1, ply + 1, False, False, -static)
+            if score >= beta:
+                return score
+
+        frontier = depth == 1
+        moves, gains = self._ordered_moves(red, blue, lily, keys, side,
+                                           static, ply, frontier, follow_pv,
+                                           tt_move)
+        on_pv = follow_pv and ply < self._prev_pv_length \
+            and moves[0] & MOVE_MASK == self._prev_pv[ply] & MOVE_MASK
+
+        best = -INF
+        best_move = NO_MOVE
+        for i in range(len(moves)):
+            move = moves[i]
+            gain = gains[i]
+            quiet = gain <= 0
+            # A frontier child's score is known: its gain is exact
+            estimate = static + gain if frontier else static
+
+            # Futility pruning: a quiet move close to the horizon cannot
+            # recover a score this far below alpha
+            if options.futility and depth <= options.futility_depth \
+                    and not pv_node and i > 0 and quiet \
+                    and estimate + options.futility_margin * depth <= alpha:
+                if estimate > best:
+                    best = estimate
+                continue
+
+            child_red, child_blue, child_lily = play(red, blue, lily, side,
+                                                     move)
+            child_keys = played_keys(keys, side, move,
+                                     child_lily & ~lily)
+            child_static = -estimate if frontier else None
+            if i == 0:
+                score = -self._pvs(child_red, child_blue, child_lily,
+                                   child_keys, depth - 1, -beta, -alpha,
+                                   ply + 1, on_pv, static=child_static)
+            else:
+                reduction = 0
+                if options.lmr and quiet and depth >= options.lmr_min_depth \
+                        and i >= options.lmr_min_moves:
+                    reduction = options.lmr_reduction
+                    if i >= options.lmr_late_moves:
+                        reduction += 1
+                    reduction = min(reduction, depth - 1)
+
+                score = -self._pvs(child_red, child_blue, child_lily,
+                                   child_keys, depth - 1 - reduction,
+                                   -alpha - 1, -alpha, ply + 1, False,
+                                   static=child_static)
+                if reduction and score > alpha:
+                    score = -self._pvs(child_red, child_blue, child_lily,
+                                       child_keys, depth - 1, -alpha - 1,
+                                       -alpha, ply + 1, False,
+                                       static=child_static)
+                if alpha < score < beta:
+                    score = -self._pvs(child_red, child_blue, child_lily,
+                                       child_keys, depth - 1, -beta, -alpha,
+                                       ply + 1, False, static=child_static)
+
+            if score > best:
+                best = score
+                best_move = move & MOVE_MASK
+            if score > alpha:
+                alpha = score
+                self._update_pv(ply, move)
+            if alpha >= beta:
+                if quiet:
+                    self._history[move & MOVE_MASK] += depth * depth
+                break
+
+        if self._tt is not None:
+            bound = EXACT
+            if best <= alpha_orig:
+                bound = UPPER
+            elif best >= beta:
+                bound = LOWER
+            self._tt.store(key, best, depth, bound,
+                           transform_move(best_move, symmetry))
+
+        return best
+
+    def _ordered_moves(self, red: int, blue: int, lily: int,
+                       keys: tuple[int, ...], side: int, static: int,
+                       ply: int, frontier: bool, follow_pv: bool,
+                       tt_move: int = NO_MOVE
+                       ) -> tuple[list[int], list[int]]:
+        """
+        Fill the ply's buffers with the moves of a position, ordered best
+        first, and their gains: at a frontier node the change in the mover's
+        static score (see `_child_scores`); elsewhere the rows advanced. The transposition table move (if any) is moved to the
+        front, and ahead of it the previous iteration's PV move (if any).
+        """
+        history = self._history
+        moves = self._move_lists[ply]
+        gains = self._gain_lists[ply]
+        moves.clear()
+        search_moves(red, blue, lily, side, moves)
+        if frontier:
+            scores = self._child_scores(red, blue, lily, keys, side, moves)
+            if side == RED:
+                gains[:] = [score - static for score in scores]
+            else:
+                gains[:] = [-score - static for score in scores]
+        else:
+            gains[:] = [move_gain(move, side) for move in moves]
+        order = sorted(range(len(moves)), key=lambda i: (
+            -gains[i], -history[moves[i] & MOVE_MASK]))
+        moves[:] = [moves[i] for i in order]
+        gains[:] = [gains[i] for i in order]
+
+        if tt_move != NO_MOVE:
+            _to_front(moves, gains, tt_move)
+        if follow_pv and ply < self._prev_pv_length:
+            _to_front(moves, gains, self._prev_pv[ply] & MOVE_MASK)
+        return moves, gains
+
+    def _quiescence_search(self, red: int, blue: int, lily: int,
+                           keys: tuple[int, ...], alpha: float, beta: float,
+                           ply: int, qdepth: int, can_pass: bool,
+                           static: int | None = None) -> float:
+        """
+        Search only forward jumps (and, under threat, moves blocking the
+        opponent's forward jumps) until the position is quiet. The player to
+        move may always "stand pat" on the static score, since growing is
+        close to passing; but if the opponent has a forward jump available,
+        standing pat is instead scored as passing the turn to them.
+        """
+        self._count_node()
+        self._pv_length[ply] = ply
+        side = self._root_side ^ ply & 1
+        if static is None:
+            static = self._static_score(red, blue, lily, keys, side)
+        if qdepth >= self._options.qs_max_depth or ply >= self._max_ply - 2:
+            return static
+
+        stand_pat = static
+        threats = forward_hop_landings(red, blue, lily, side ^ 1) \
+            if can_pass else 0
+        if threats:
+            stand_pat = -self._quiescence_search(red, blue, lily,
+                toggle(keys, side_keys()), -beta, -alpha, ply + 1,
+                qdepth + 1, False, -static)
+
+        if stand_pat >= beta:
+            return stand_pat
+        best = stand_pat
+        if stand_pat > alpha:
+            alpha = stand_pat
+
+        own = red if side == RED else blue
+        moves = self._move_lists[ply]
+        moves.clear()
+        jump_moves(own, red | blue, lily, side, moves)
+        moves.sort(key=lambda move: -move_gain(move, side))
+        for move in moves:
+            gain = move_gain(move, side) * SCORE_SCALE
+            # Only forward jumps are searched; and, by delta pruning, only
+            # while a jump's gain (a unit of score per row) could still lift
+            # us past alpha
+            if gain <= 0 or static + gain + self._options.qs_delta_margin \
+                    <= alpha:
+                break
+            score = -self._quiescence_search(
+                *play(red, blue, lily, side, move),
+                played_keys(keys, side, move), -beta, -alpha,
+                ply + 1, qdepth + 1, True)
+            if score > best:
+                best = score
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                return best
+
+        if threats:
+            moves.clear()
+            step_moves(own, threats, side, moves)
+            for move in moves:
+                score = -self._quiescence_search(
+                    *play(red, blue, lily, side, move),
+                    played_keys(keys, side, move), -beta, -alpha,
+                    ply + 1, qdepth + 1, True)
+                if score > best:
+                    best = score
+                if score > alpha:
+                    alpha = score
+                if alpha >= beta:
+                    return best
+
+        return best
+
+    def _static_score(self, red: int, blue: int, lily: int,
+                      keys: tuple[int, ...], side: int) -> int:
+        """
+        Static evaluation of a position from the perspective of the side to
+        move, through the evaluation cache (keyed by the position's key in
+        its own frame) if there is one.
+        """
+        cache = self._eval_cache
+        score = cache.probe(keys[0]) if cache is not None else None
+        if score is None:
+            score = self._evaluator.evaluate(red, blue, lily)
+            if cache is not None:
+                cache.store(keys[0], score)
+        return score if side == RED else -score
+
+    def _child_scores(self, red: int, blue: int, lily: int,
+                      keys: tuple[int, ...], side: int,
+                      moves: list[int]) -> list[int]:
+        """
+        Static evaluations (from red's perspective) of the positions after
+        each of the given moves, through the evaluation cache if there is
+        one: only the children it misses are evaluated, as one batch, and
+        stored back.
+        """
+        children = [play(red, blue, lily, side, move) for move in moves]
+        cache = self._eval_cache
+        if cache is None:
+            return self._evaluator.evaluate_batch(children)
+        child_keys = [played_keys(keys, side, move, child[2] & ~lily)[0]
+                      for move, child in zip(moves, children)]
+        scores = [cache.probe(key) for key in child_keys]
+        missed = [i for i, score in enumerate(scores) if score is None]
+        if missed:
+            evaluated = self._evaluator.evaluate_batch(
+                [children[i] for i in missed])
+            for i, score in zip(missed, evaluated):
+                scores[i] = score
+                cache.store(child_keys[i], score)
+        return scores
+
+    def _count_node(self):
+        self.nodes += 1
+        if self._max_nodes is not None and self.nodes > self._max_nodes:
+            raise SearchAborted
+        if self._should_stop is not None \
+                and self.nodes % STOP_CHECK_INTERVAL == 0 \
+                and self._should_stop():
+            raise SearchAborted
+
+    def _update_pv(self, ply: int, move: int):
+        row = self._pv_table[ply]
+        child_row = self._pv_table[ply + 1]
+        row[ply] = move
+        for i in range(ply + 1, self._pv_length[ply + 1]):
+            row[i] = child_row[i]
+        self._pv_length[ply] = max(self._pv_length[ply + 1], ply + 1)
+
+
+def _to_front(moves: list[int], gains: list[int], move: int):
+    # Move a (packed, pathless) move and its gain to the front of the buffers
+    for i in range(len(moves)):
+        if moves[i] & MOVE_MASK == move:
+            moves.insert(0, moves.pop(i))
+            gains.insert(0, gains.pop(i))
+            return
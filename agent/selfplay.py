@@ -0,0 +1,184 @@
+# COMP30024 Artificial Intelligence, Semester 1 2025
+# Project Part B: Game Playing Agent
+
+# Self-play: games between in-process agents (no referee, subprocesses or
+# logging), played across a process pool, for training data (see tuning.py)
+# and benchmarking:
+#
+#   python -m agent.selfplay OUTPUT_DIR [--games N] [--player pvs]
+#       [--opponent random] [--opening 4] [--nodes N] [--processes N]
+#
+# The two players take turns to move first. Each game starts with a few
+# uniformly random moves so that games between deterministic agents differ.
+# Games are appended, as they finish, to shard files `games-<shard>.bin` in
+# OUTPUT_DIR, one shard per job: each game is a header (result for red,
+# random opening plies, number of moves) followed by its packed moves, two
+# bytes each.
+
+import argparse
+import os
+import random
+import struct
+import time
+from multiprocessing import Pool
+from pathlib import Path
+
+from referee.game import PlayerColor, Action, Board
+
+from .bitboard import RED, START_POSITION, moves, play, to_action, \
+    from_action, side_index
+from .program import Agent, PVS_MAX_NODES, SEARCHES
+
+OPENING_PLIES = 4       # Random moves at the start of each game
+GAMES = 100
+PLAYERS = (*SEARCHES, "random")
+
+_GAME = struct.Struct("<BBH")   # Result for red (x2), opening plies, moves
+_MOVE = struct.Struct("<H")
+
+
+class RandomPlayer:
+    """
+    Baseline player choosing uniformly among the legal moves.
+    """
+    def __init__(self, color: PlayerColor, seed: int | None = None):
+        self._side = side_index(color)
+        self._position = START_POSITION
+        self._rng = random.Random(seed)
+
+    def action(self, **referee: dict) -> Action:
+        return to_action(*self._position, self._side,
+                         self._rng.choice(moves(*self._position,
+                                                self._side)))
+
+    def update(self, color: PlayerColor, action: Action, **referee: dict):
+        side = side_index(color)
+        self._position = play(*self._position, side,
+                              from_action(*self._position, side, action))
+
+
+def _player(name: str, color: PlayerColor, max_nodes: int, seed: int):
+    if name == "random":
+        return RandomPlayer(color, seed)
+    return Agent(color, search=name, max_nodes=max_nodes)
+
+
+def play_game(red: str, blue: str, opening: int = OPENING_PLIES,
+              max_nodes: int = PVS_MAX_NODES, seed: int | None = None
+              ) -> tuple[list[int], float]:
+    """
+    Play one game between the named players (red moving first), the first
+    `opening` plies being random moves. Returns the packed moves and the
+    result for red (1 win, 0.5 draw, 0 loss).
+    """
+    rng = random.Random(seed)
+    board = Board()
+    players = {PlayerColor.RED: _player(red, PlayerColor.RED, max_nodes,
+                                        rng.getrandbits(32)),
+               PlayerColor.BLUE: _player(blue, PlayerColor.BLUE, max_nodes,
+                                         rng.getrandbits(32))}
+    position, side = START_POSITION, RED
+    played = []
+    while not board.game_over:
+        color = board.turn_color
+        if len(played) < opening:
+            action = to_action(*position, side,
+                               rng.choice(moves(*position, side)))
+        else:
+            action = players[color].action()
+        board.apply_action(action)
+        move = from_action(*position, side, action)
+        position = play(*position, side, move)
+        played.append(move)
+        for player in players.values():
+            player.update(color, action)
+        side ^= 1
+
+    winner = board.winner_color
+    result = 0.5 if winner is None else float(winner == PlayerColor.RED)
+    return played, result
+
+
+def _play_shard(job) -> tuple[int, float, float]:
+    # Play a shard's games, appending each to its file as it finishes.
+    # Returns the games played, the player's points, and the CPU time taken
+    path, games, player, opponent, opening, max_nodes, seed = job
+    rng = random.Random(seed)
+    points = 0.0
+    start = time.process_time()
+    with open(path, "ab") as f:
+        for i in range(games):
+            red, blue = (player, opponent) if i % 2 == 0 \
+                else (opponent, player)
+            played, result = play_game(red, blue, opening, max_nodes,
+                                       rng.getrandbits(32))
+            points += result if i % 2 == 0 else 1 - result
+            f.write(_GAME.pack(round(result * 2), min(opening, len(played)),
+                               len(played)))
+            f.write(b"".join(_MOVE.pack(move) for move in played))
+            f.flush()
+    return games, points, time.process_time() - start
+
+
+def read_shard(path: str | Path):
+    """
+    The games in a self-play shard file, as (packed moves, result for red)
+    pairs, where red is the side which moved first.
+    """
+    data = Path(path).read_bytes()
+    offset = 0
+    while offset + _GAME.size <= len(data):
+        result, _, count = _GAME.unpack_from(data, offset)
+        offset += _GAME.size
+        played = [move for move, in
+                  _MOVE.iter_unpack(data[offset:offset + count * _MOVE.size])]
+        offset += count * _MOVE.size
+        yield played, result / 2
+
+
+def run(output: Path, games: int = GAMES, player: str = "pvs",
+        opponent: str = "pvs", opening: int = OPENING_PLIES,
+        max_nodes: int = PVS_MAX_NODES, processes: int | None = None,
+        shards: int | None = None, seed: int = 0):
+    """
+    Play `games` games across a process pool, split into `shards` jobs (one
+    per process by default), each writing its own shard file in `output`.
+    """
+    processes = processes or os.cpu_count() or 1
+    shards = shards or processes
+    rng = random.Random(seed)
+    jobs = [(output / f"games-{shard:03}.bin",
+             games // shards + (shard < games % shards),
+             player, opponent, opening, max_nodes, rng.getrandbits(32))
+            for shard in range(shards)]
+    output.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+    with Pool(processes) as pool:
+        results = pool.map(_play_shard, jobs)
+    elapsed = time.perf_counter() - start
+
+    played = sum(count for count, _, _ in results)
+    points = sum(points for _, points, _ in results)
+    cpu = sum(cpu for _, _, cpu in results)
+    cores = min(processes, shards)
+    print(f"{played} games in {elapsed:.1f}s on {cores} cores: "
+          f"{played / elapsed / cores:.3f} games/s/core, "
+          f"{cpu / max(played, 1):.2f}s CPU per game")
+    print(f"{player} scored {points:g}/{played} against {opponent}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Play games between in-process agents.")
+    parser.add_argument("output", type=Path)
+    parser.add_argument("--games", type=int, default=GAMES)
+    parser.add_argument("--player", choices=PLAYERS, default="pvs")
+    parser.add_argument("--opponent", choices=PLAYERS, default="pvs")
+    parser.add_argument("--opening", type=int, default=OPENING_PLIES)
+    parser.add_argument("--nodes", type=int, default=PVS_MAX_NODES)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--shards", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    run(args.output, args.games, args.player, args.opponent, args.opening,
+        args.nodes, args.processes, args.shards, args.seed)
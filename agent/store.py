@@ -0,0 +1,126 @@
+# COMP30024 Artificial Intelligence, Semester 1 2025
+# Project Part B: Game Playing Agent
+
+# Persistent position store: deep search results from earlier games, kept in
+# a file with the same layout as a transposition table so that the agent can
+# map it into memory (read-only) and probe it directly.
+#
+# Agents created with `harvest=<path>` append the root result of each deep
+# enough search to a log file. Logs from any number of games are folded into
+# the store (keeping the deepest result for each position) with:
+#
+#   python -m agent.store LOG [LOG ...] [--entries N]
+#
+# which writes `positions.bin` next to this file.
+
+import argparse
+import struct
+from pathlib import Path
+
+from .tables import MappedFile
+from .tt import TranspositionTable, TTEntry, EXACT
+
+STORE_FILE = Path(__file__).with_name("positions.bin")
+STORE_ENTRIES = 1 << 16     # Entries in a merged store (16 bytes each)
+STORE_MIN_DEPTH = 4         # Shallowest search result worth harvesting
+
+_HEADER = struct.Struct("<4sHxxI")      # Magic, version, entries
+_RESULT = struct.Struct("<QhBBH")       # Key, score, depth, bound, move
+_MAGIC = b"FPOS"
+_VERSION = 2
+
+
+class PositionStore(MappedFile):
+    """
+    A position store file: a header (magic, version, entries) then the
+    entries of a transposition table (see tt.py), probed in place.
+    """
+    def __init__(self, path: Path = STORE_FILE):
+        super().__init__(path)
+        magic, version, entries = _HEADER.unpack_from(self._mmap)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"{path} is not a compatible position store")
+        self._body = memoryview(self._mmap)[_HEADER.size:]
+        self._tt = TranspositionTable(self._body, entries)
+        self.entries = entries
+
+    def probe(self, key: int) -> TTEntry | None:
+        return self._tt.probe(key)
+
+    def close(self):
+        self._tt.release()
+        self._body.release()
+        super().close()
+
+    def results(self):
+        """
+        Every stored result, as (key, entry) pairs.
+        """
+        with self._body.cast("Q") as view:
+            for i in range(0, self.entries * 2, 2):
+                data = view[i + 1]
+                if data:
+                    key = view[i] ^ data
+                    yield key, self._tt.probe(key)
+
+
+class Harvest:
+    """
+    Log of search results to be merged into the position store, appended to
+    as the agent plays.
+    """
+    def __init__(self, path: str | Path):
+        self._path = Path(path)
+
+    def record(self, key: int, entry: TTEntry):
+        # Bounds (e.g. from an aspiration window failing) cannot be resumed
+        # from, and would displace shallower exact results when merged
+        if entry.depth < STORE_MIN_DEPTH or entry.bound != EXACT:
+            return
+        with open(self._path, "ab") as f:
+            f.write(_RESULT.pack(key, entry.score, entry.depth, entry.bound,
+                                 entry.move))
+
+
+def read_harvest(path: str | Path):
+    """
+    The results in a harvest log, as (key, entry) pairs.
+    """
+    data = Path(path).read_bytes()
+    for key, score, depth, bound, move in _RESULT.iter_unpack(
+            data[:len(data) - len(data) % _RESULT.size]):
+        yield key, TTEntry(score, depth, bound, move)
+
+
+def merge(logs: list[str | Path], path: Path = STORE_FILE,
+          entries: int = STORE_ENTRIES):
+    """
+    Fold the results in the given harvest logs into the store at `path`
+    (created if it does not exist), keeping the deepest result for each
+    position and, on collisions, for each slot.
+    """
+    buffer = bytearray(TranspositionTable.buffer_size(entries))
+    table = TranspositionTable(buffer, entries)
+    existing = PositionStore.open(path)
+    sources = [existing.results()] if existing is not None else []
+    sources += [read_harvest(log) for log in logs]
+    for source in sources:
+        for key, entry in source:
+            if entry is not None:
+                table.store(key, entry.score, entry.depth, entry.bound,
+                            entry.move)
+
+    table.release()
+    if existing is not None:
+        existing.close()
+    path.write_bytes(_HEADER.pack(_MAGIC, _VERSION, entries) + buffer)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Merge harvested search results into the position store.")
+    parser.add_argument("logs", nargs="+")
+    parser.add_argument("--entries", type=int, default=STORE_ENTRIES)
+    args = parser.parse_args()
+    merge(args.logs, entries=args.entries)
+    print(f"wrote {STORE_FILE}")
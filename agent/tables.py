@@ -0,0 +1,145 @@
+# COMP30024 Artificial Intelligence, Semester 1 2025
+# Project Part B: Game Playing Agent
+
+# Precomputed tables: the Zobrist keys (see tt.py) and, per side, square and
+# direction, the destination of a step and of a hop (see bitboard.py). The
+# referee counts the agent's imports against its time, and computing these
+# through the referee's Coord and Direction classes is slow, so they are
+# generated once:
+#
+#   python -m agent.tables
+#
+# and written to `tables.bin` next to this file, which is mapped into memory
+# on import. Without the file, the tables are built in memory instead.
+
+import mmap
+import struct
+from pathlib import Path
+from random import Random
+
+from referee.game import Direction
+from referee.game.constants import BOARD_N
+
+TABLES_FILE = Path(__file__).with_name("tables.bin")
+ZOBRIST_SEED = 30024    # Fixed, so that every process agrees on the keys
+
+# The directions each side may move in (the same number for both)
+SIDE_DIRECTIONS = [
+    (Direction.Right, Direction.Left,
+     Direction.Down, Direction.DownLeft, Direction.DownRight),
+    (Direction.Right, Direction.Left,
+     Direction.Up, Direction.UpLeft, Direction.UpRight),
+]
+NO_SQUARE = 0xFF        # Destination of a step or hop off the board
+
+_CELLS = BOARD_N * BOARD_N
+_KEYS = 3 * _CELLS + 1      # Red, blue and lily keys, then blue to move
+_MOVES = len(SIDE_DIRECTIONS) * _CELLS * len(SIDE_DIRECTIONS[0])
+
+_HEADER = struct.Struct("<4sHH")    # Magic, version, board size
+_MAGIC = b"FTAB"
+_VERSION = 1
+
+
+def _destination(sq: int, direction: Direction, n: int) -> int:
+    r = sq // BOARD_N + direction.value.r * n
+    c = sq % BOARD_N + direction.value.c * n
+    if 0 <= r < BOARD_N and 0 <= c < BOARD_N:
+        return r * BOARD_N + c
+    return NO_SQUARE
+
+
+def build() -> bytes:
+    """
+    The contents of a tables file: the header, the 64-bit keys, then the
+    step and the hop destinations (a byte each) indexed by side, square and
+    direction.
+    """
+    rng = Random(ZOBRIST_SEED)
+    keys = [rng.getrandbits(64) for _ in range(_KEYS)]
+    steps, hops = bytearray(), bytearray()
+    for directions in SIDE_DIRECTIONS:
+        for sq in range(_CELLS):
+            steps += bytes(_destination(sq, d, 1) for d in directions)
+            hops += bytes(_destination(sq, d, 2) for d in directions)
+    return (_HEADER.pack(_MAGIC, _VERSION, BOARD_N)
+            + struct.pack(f"<{_KEYS}Q", *keys) + steps + hops)
+
+
+def map_file(path: Path) -> mmap.mmap:
+    """
+    Map the file at `path` into memory, read-only.
+    """
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class MappedFile:
+    """
+    Base class of the data files built offline and mapped into memory by the
+    agent (see patterns.py, book.py and store.py) rather than read and
+    parsed. Subclasses check and parse their own header from `_mmap`.
+    """
+    def __init__(self, path: Path):
+        self._mmap = map_file(path)
+
+    @classmethod
+    def open(cls, path: Path | None = None) -> 'MappedFile | None':
+        """
+        Map the file at `path` (the class's default file if None), or return
+        None if it has not been built.
+        """
+        try:
+            return cls() if path is None else cls(path)
+        except FileNotFoundError:
+            return None
+
+    def close(self):
+        """
+        Unmap the file. Subclasses first release any views they hold of it.
+        """
+        self._mmap.close()
+
+
+class Tables:
+    """
+    Read-only views of the tables, over a mapped tables file (or the bytes
+    of one).
+    """
+    def __init__(self, data):
+        magic, version, board_n = _HEADER.unpack_from(data)
+        if magic != _MAGIC or version != _VERSION or board_n != BOARD_N:
+            raise ValueError("incompatible tables (regenerate them)")
+        self._data = data
+        view = memoryview(data)[_HEADER.size:]
+        self.keys = view[:_KEYS * 8].cast("Q")
+        self.steps = view[_KEYS * 8:_KEYS * 8 + _MOVES]
+        self.hops = view[_KEYS * 8 + _MOVES:_KEYS * 8 + 2 * _MOVES]
+
+    @classmethod
+    def load(cls, path: Path = TABLES_FILE) -> 'Tables':
+        """
+        Map the tables file at `path`, or build the tables if there is none
+        (or it is out of date).
+        """
+        try:
+            return cls(map_file(path))
+        except (FileNotFoundError, ValueError):
+            return cls(build())
+
+    def destinations(self, table: memoryview, side: int, sq: int
+                     ) -> memoryview:
+        """
+        A square's row of `steps` or `hops`: one destination per direction
+        of the side (in `SIDE_DIRECTIONS` order).
+        """
+        i = (side * _CELLS + sq) * len(SIDE_DIRECTIONS[side])
+        return table[i:i + len(SIDE_DIRECTIONS[side])]
+
+
+TABLES = Tables.load()
+
+
+if __name__ == "__main__":
+    TABLES_FILE.write_bytes(build())
+    print(f"wrote {TABLES_FILE}")
@@ -0,0 +1,282 @@
+# COMP30024 Artificial Intelligence, Semester 1 2025
+# Project Part B: Game Playing Agent
+
+import mmap
+from dataclasses import dataclass
+from operator import xor
+
+from referee.game import Coord, Direction, Action, MoveAction, GrowAction
+from referee.game.constants import BOARD_N
+
+from .tables import TABLES
+
+TT_ENTRIES = 1 << 20    # Default number of entries (16 bytes each)
+
+# Bound types of stored scores
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Packed moves: 6 bits source square, 6 bits destination square, plus a flag
+# bit so that 0 means "no move". A grow is encoded with all bits set.
+NO_MOVE = 0
+GROW_MOVE = 0x1FFF
+MOVE_MASK = 0x1FFF
+_MOVE_FLAG = 1 << 12
+
+# A move's path (the direction of its step, or of each of its hops) can be
+# carried above those bits, as 4 bits per direction: its index in DIRECTIONS
+# plus one, first direction lowest. Only the move bits identify a move (e.g.
+# in the transposition table); the path is needed to build its action.
+DIRECTIONS = tuple(Direction)
+PATH_SHIFT = 13
+PATH_BITS = 4
+
+_SCORE_OFFSET = 1 << 15
+
+# Zobrist keys, generated from a fixed seed so that every process (e.g.
+# parallel search workers) agrees on them (see tables.py)
+_CELLS = BOARD_N * BOARD_N
+_RED_KEYS = TABLES.keys[:_CELLS].tolist()
+_BLUE_KEYS = TABLES.keys[_CELLS:2 * _CELLS].tolist()
+_LILY_KEYS = TABLES.keys[2 * _CELLS:3 * _CELLS].tolist()
+_BLUE_TO_MOVE_KEY = TABLES.keys[3 * _CELLS]
+
+
+def square(coord: Coord) -> int:
+    return coord.r * BOARD_N + coord.c
+
+
+# Positions are hashed under each of these symmetries (bit 0: mirror the
+# board left-right; bit 1: swap the colours, flipping the board top-bottom so
+# that each side still moves towards its goal row), and the smallest of the
+# resulting keys is used as the canonical key. Use (0, 1) for mirroring only.
+SYMMETRIES = (0, 1, 2, 3)
+MIRROR = 1
+COLOUR_FLIP = 2
+
+
+def transform_square(sq: int, symmetry: int) -> int:
+    r, c = divmod(sq, BOARD_N)
+    if symmetry & MIRROR:
+        c = BOARD_N - 1 - c
+    if symmetry & COLOUR_FLIP:
+        r = BOARD_N - 1 - r
+    return r * BOARD_N + c
+
+
+def transform_move(move: int, symmetry: int) -> int:
+    """
+    A packed move mapped through a symmetry (each symmetry is its own
+    inverse, so this also maps a move back).
+    """
+    if move in (NO_MOVE, GROW_MOVE) or not symmetry:
+        return move
+    start, dest = move_squares(move)
+    return pack_move(transform_square(start, symmetry),
+                     transform_square(dest, symmetry))
+
+
+def _variant_keys(keys: list[int], other: list[int]) -> list[tuple[int, ...]]:
+    # Per square, its key in the frame of each symmetry (using `other` when
+    # the symmetry swaps colours)
+    return [
+        tuple((other if symmetry & COLOUR_FLIP else keys)
+              [transform_square(sq, symmetry)] for symmetry in SYMMETRIES)
+        for sq in range(BOARD_N * BOARD_N)
+    ]
+
+
+_RED_VARIANTS = _variant_keys(_RED_KEYS, _BLUE_KEYS)
+_BLUE_VARIANTS = _variant_keys(_BLUE_KEYS, _RED_KEYS)
+_LILY_VARIANTS = _variant_keys(_LILY_KEYS, _LILY_KEYS)
+_SIDE_VARIANTS = (_BLUE_TO_MOVE_KEY,) * len(SYMMETRIES)
+
+
+
+
+
+def side_keys() -> tuple[int, ...]:
+    """
+    The keys toggled whenever the player to move changes.
+    """
+    return _SIDE_VARIANTS
+
+
+def toggle(keys: tuple[int, ...], delta: tuple[int, ...]) -> tuple[int, ...]:
+    """
+    Zobrist keys (one per symmetry) with another set of keys toggled in.
+    """
+    return tuple(map(xor, keys, delta))
+
+
+def board_keys(red: int, blue: int, lily: int, side: int) -> tuple[int, ...]:
+    """
+    Zobrist hashes of a position given as bitboards (see bitboard.py), with
+    the given side (0 red, 1 blue) to move, one in the frame of each
+    symmetry.
+    """
+    keys = [_BLUE_TO_MOVE_KEY if bool(side) != bool(symmetry & COLOUR_FLIP)
+            else 0 for symmetry in SYMMETRIES]
+    for mask, variants in ((red, _RED_VARIANTS), (blue, _BLUE_VARIANTS),
+                           (lily, _LILY_VARIANTS)):
+        while mask:
+            bit = mask & -mask
+            mask ^= bit
+            keys = list(map(xor, keys, variants[bit.bit_length() - 1]))
+    return tuple(keys)
+
+
+def played_keys(keys: tuple[int, ...], side: int, move: int,
+                grown: int = 0) -> tuple[int, ...]:
+    """
+    The keys (see `board_keys`) of a position after the given side plays a
+    packed move, updated rather than recomputed. For a grow, `grown` is the
+    mask of cells it turns into lily pads (see `bitboard.grow_cells`).
+    """
+    if move & MOVE_MASK == GROW_MOVE:
+        keys = toggle(keys, _SIDE_VARIANTS)
+        while grown:
+            bit = grown & -grown
+            grown ^= bit
+            keys = toggle(keys, _LILY_VARIANTS[bit.bit_length() - 1])
+        return keys
+    # The frog leaves its start cell for a lily pad, which it covers
+    start, dest = move_squares(move)
+    frogs = _BLUE_VARIANTS if side else _RED_VARIANTS
+    return tuple(key ^ a ^ b ^ lily ^ _BLUE_TO_MOVE_KEY for key, a, b, lily
+                 in zip(keys, frogs[start], frogs[dest], _LILY_VARIANTS[dest]))
+
+
+def canonical(keys: tuple[int, ...]) -> tuple[int, int]:
+    """
+    The canonical key of a position (given its keys under each symmetry), and
+    the symmetry which maps the position to its canonical frame.
+    """
+    key = min(keys)
+    return key, SYMMETRIES[keys.index(key)]
+
+
+def encode_move(start: Coord, dest: Coord) -> int:
+    return pack_move(square(start), square(dest))
+
+
+def pack_move(start: int, dest: int) -> int:
+    """
+    Packed form of a move between two squares (see `square`).
+    """
+    return _MOVE_FLAG | start << 6 | dest
+
+
+def move_squares(move: int) -> tuple[int, int]:
+    """
+    The (start, destination) squares of a packed move (other than a grow).
+    """
+    return move >> 6 & 0x3F, move & 0x3F
+
+
+def with_path(move: int, path: int) -> int:
+    return move | path << PATH_SHIFT
+
+
+def move_action(move: int) -> Action:
+    """
+    The referee action for a packed move carrying its path.
+    """
+    if move & MOVE_MASK == GROW_MOVE:
+        return GrowAction()
+    start = move >> 6 & 0x3F
+    directions = []
+    path = move >> PATH_SHIFT
+    while path:
+        directions.append(DIRECTIONS[(path & 0xF) - 1])
+        path >>= PATH_BITS
+    return MoveAction(Coord(start // BOARD_N, start % BOARD_N),
+                      tuple(directions))
+
+
+@dataclass(frozen=True, slots=True)
+class TTEntry:
+    score: int
+    depth: int
+    bound: int
+    move: int
+
+
+class TranspositionTable:
+    """
+    A fixed-size hash table of search results, stored as pairs of 64-bit
+    words in a flat buffer so that it can live in shared memory and be used by
+    several processes at once without locks.
+
+    Each entry is written as (key ^ data, data). A reader recomputes the key
+    from both words, so an entry torn by a concurrent write (or belonging to
+    another position) simply fails to match and is ignored.
+
+    Entries are kept across turns rather than cleared. Each is tagged with the
+    generation (turn) in which it was stored, and a deeper entry is only
+    protected from replacement while it belongs to the current generation
+    (or to the same position).
+    """
+    def __init__(self, buffer=None, entries: int = TT_ENTRIES):
+        assert entries & (entries - 1) == 0, "entries must be a power of two"
+        if buffer is None:
+            # Anonymous memory, zeroed by the OS a page at a time as it is
+            # first touched rather than all at once here
+            buffer = mmap.mmap(-1, entries * 16)
+        self._raw = memoryview(buffer).cast("B")
+        self._view = self._raw.cast("Q")
+        assert len(self._view) >= entries * 2, "buffer too small"
+        self._mask = entries - 1
+        self.generation = 0
+
+    @staticmethod
+    def buffer_size(entries: int = TT_ENTRIES) -> int:
+        return entries * 16
+
+    def probe(self, key: int) -> TTEntry | None:
+        i = (key & self._mask) << 1
+        data = self._view[i + 1]
+        if self._view[i] ^ data != key:
+            return None
+        return TTEntry(
+            (data & 0xFFFF) - _SCORE_OFFSET,
+            (data >> 16) & 0xFF,
+            (data >> 24) & 0x3,
+            (data >> 26) & 0x1FFF,
+        )
+
+    def new_generation(self):
+        """
+        Start a new generation (e.g. turn), making every existing entry stale.
+        """
+        self.generation = (self.generation + 1) & 0xFF
+
+    def store(self, key: int, score: float, depth: int, bound: int,
+              move: int = NO_MOVE):
+        # Unbounded (or NaN) and non-integral scores are not stored; the range
+        # check comes first, as int() cannot convert an infinite score
+        if not -_SCORE_OFFSET <= score < _SCORE_OFFSET or score != int(score):
+            return
+        i = (key & self._mask) << 1
+        old_data = self._view[i + 1]
+        if ((old_data >> 16) & 0xFF) > depth and (
+            self._view[i] ^ old_data == key
+            or (old_data >> 39) & 0xFF == self.generation
+        ):
+            return  # Keep the deeper result for this position or generation
+        data = (int(score) + _SCORE_OFFSET) | min(depth, 0xFF) << 16 \
+            | bound << 24 | move << 26 | self.generation << 39
+        self._view[i + 1] = data
+        self._view[i] = key ^ data
+
+    def clear(self):
+        self._raw[:] = bytes(len(self._raw))
+
+    def release(self):
+        """
+        Release the view of the underlying buffer (required before a shared
+        memory block can be closed).
+        """
+        self._view.release()
+        self._raw.release()
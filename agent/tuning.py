@@ -0,0 +1,258 @@
+# COMP30024 Artificial Intelligence, Semester 1 2025
+# Project Part B: Game Playing Agent
+
+# Evaluation weight tuning ("Texel" tuning): every position of a set of
+# finished games is labelled with the game's result, and the weights of the
+# evaluation features (see evaluation.py) are fitted so that a logistic
+# function of the evaluation predicts those results, by minimising the log
+# loss with batched gradient descent. Games are read from referee game logs
+# (written with `python -m referee -l LOGFILE ...`) and self-play shards
+# (`.bin` files written by selfplay.py):
+#
+#   python -m agent.tuning GAMES [GAMES ...] [--epochs N] [--rate R]
+#
+# and the fitted weights, normalised (see `normalise`), are written to
+# `weights.json` next to this file, which the agent loads at startup.
+# Requires NumPy.
+
+import argparse
+import re
+from pathlib import Path
+
+import numpy as np
+
+from referee.game import PlayerColor, Coord, Direction, \
+    Action, MoveAction, GrowAction
+
+from .bitboard import RED, START_POSITION, play, from_action
+from .evaluation import Evaluator, FEATURES, SCORE_SCALE, WEIGHTS_FILE, \
+    batch_features
+from .patterns import PatternDatabase
+from .selfplay import read_shard
+
+SKIP_PLIES = 6          # Opening plies left out (the same in most games)
+EPOCHS = 100
+BATCH_SIZE = 4096       # Positions per gradient step
+LEARNING_RATE = 0.05
+HOLDOUT = 0.1           # Fraction of games kept aside to validate the fit
+CHUNK = 1 << 16         # Positions per feature extraction batch
+
+# A game: its packed moves, and its result for red (1 win, 0.5 draw, 0 loss)
+Game = tuple[list[int], float]
+
+_RESULTS = {f"winner:{PlayerColor.RED}": 1.0,
+            f"winner:{PlayerColor.BLUE}": 0.0,
+            "winner:None": 0.5}
+_MOVE = re.compile(r"MOVE\((\d)-(\d), \[(.*)\]\)")
+_DIRECTIONS = {str(direction): direction for direction in Direction}
+
+
+def parse_action(text: str) -> Action:
+    """
+    The action logged as `text` (its string form, e.g. "MOVE(0-2, [[↘]])").
+    """
+    if text == str(GrowAction()):
+        return GrowAction()
+    match = _MOVE.fullmatch(text)
+    if match is None:
+        raise ValueError(f"unrecognised action: {text}")
+    r, c, directions = match.groups()
+    return MoveAction(Coord(int(r), int(c)),
+                      tuple(_DIRECTIONS[d] for d in directions.split(", ")))
+
+
+def read_game_log(path: str | Path) -> Game | None:
+    """
+    The game recorded in a referee game log (see `game_event_logger` in
+    referee/run.py), or None if it did not finish normally.
+    """
+    red, blue, lily = START_POSITION
+    side = RED
+    moves = []
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        fields = line.split("\t")
+        if len(fields) < 3:
+            continue
+        event = fields[2]
+        if event == "turn_end":
+            move = from_action(red, blue, lily, side, parse_action(fields[4]))
+            red, blue, lily = play(red, blue, lily, side, move)
+            side ^= 1
+            moves.append(move)
+        elif event == "game_end":
+            return moves, _RESULTS[fields[3]]
+        elif event in ("player_error", "unhandled_error"):
+            return None
+    return None
+
+
+def read_games(path: str | Path) -> list[Game]:
+    """
+    The finished games in a self-play shard or a referee game log.
+    """
+    if Path(path).suffix == ".bin":
+        return list(read_shard(path))
+    game = read_game_log(path)
+    return [game] if game is not None else []
+
+
+def positions(games: list[Game], skip: int = SKIP_PLIES
+              ) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Every position (after the first `skip` plies) of the given games, as a
+    (positions, 3) uint64 array of (red, blue, free lily) bitboards, and
+    each position's game result.
+    """
+    boards, results = [], []
+    for moves, result in games:
+        board = START_POSITION
+        for ply, move in enumerate(moves):
+            board = play(*board, ply % 2, move)
+            if ply + 1 >= skip:
+                boards.append(board)
+        results += [result] * (len(moves) + 1 - max(skip, 1))
+    return (np.array(boards, dtype=np.uint64).reshape(-1, 3),
+            np.array(results, dtype=np.float64))
+
+
+def feature_matrix(boards: np.ndarray, names=FEATURES,
+                   patterns: PatternDatabase | None = None) -> np.ndarray:
+    """
+    The named features of each position, extracted a chunk at a time.
+    """
+    table = None
+    if patterns is not None:
+        table = np.frombuffer(patterns.table, dtype=np.uint8)
+    return np.concatenate(
+        [batch_features(boards[i:i + CHUNK], names, table)
+         for i in range(0, len(boards), CHUNK)]
+        or [np.zeros((0, len(names)))])
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1 / (1 + np.exp(-x))
+
+
+def log_loss(scores: np.ndarray, results: np.ndarray, scale: float) -> float:
+    """
+    Mean log loss of predicting the results as `sigmoid(scale * score)`.
+    """
+    p = np.clip(_sigmoid(scale * scores), 1e-12, 1 - 1e-12)
+    return float(-np.mean(results * np.log(p)
+                          + (1 - results) * np.log(1 - p)))
+
+
+def fit_scale(scores: np.ndarray, results: np.ndarray) -> float:
+    """
+    The scale turning evaluation scores into predicted results which best
+    fits the given scores (a ternary search, the loss being convex in it).
+    """
+    lo, hi = 1e-4, 10.0
+    for _ in range(100):
+        a, b = lo + (hi - lo) / 3, hi - (hi - lo) / 3
+        if log_loss(scores, results, a) < log_loss(scores, results, b):
+            hi = b
+        else:
+            lo = a
+    return (lo + hi) / 2
+
+
+def fit_weights(features: np.ndarray, results: np.ndarray,
+                weights: np.ndarray, scale: float, epochs: int = EPOCHS,
+                batch_size: int = BATCH_SIZE, rate: float = LEARNING_RATE,
+                seed: int = 0) -> np.ndarray:
+    """
+    Minimise the log loss over the weights by mini-batch gradient descent,
+    starting from `weights`. Features are standardised for the descent, so
+    that one learning rate suits them all.
+    """
+    spread = features.std(axis=0)
+    spread[spread == 0] = 1
+    x = features / spread
+    w = weights * spread
+    rng = np.random.default_rng(seed)
+    for _ in range(epochs):
+        order = rng.permutation(len(x))
+        for i in range(0, len(x), batch_size):
+            batch = order[i:i + batch_size]
+            error = _sigmoid(scale * (x[batch] @ w)) - results[batch]
+            w -= rate * scale * (x[batch].T @ error) / len(batch)
+    return w / spread
+
+
+def tune(games: list[Game], names=FEATURES, epochs: int = EPOCHS,
+         rate: float = LEARNING_RATE, holdout: float = HOLDOUT,
+         seed: int = 0) -> Evaluator:
+    """
+    An evaluator with the named features' weights fitted to the given games,
+    starting from the current (saved or default) weights. Progress is
+    reported on the training games and on a `holdout` fraction kept aside.
+    """
+    patterns = PatternDatabase.open()
+    current = Evaluator.load(patterns)
+    rng = np.random.default_rng(seed)
+    games = [games[i] for i in rng.permutation(len(games))]
+    split = int(len(games) * (1 - holdout))
+    train_boards, train_results = positions(games[:split])
+    test_boards, test_results = positions(games[split:])
+    train = feature_matrix(train_boards, names, patterns)
+    test = feature_matrix(test_boards, names, patterns)
+    print(f"{len(train)} training and {len(test)} validation positions")
+
+    weights = np.array([current.weights[name] for name in names],
+                       dtype=np.float64)
+    scale = fit_scale(train @ weights, train_results)
+
+    def report(label: str, weights: np.ndarray):
+        losses = [f"{log_loss(x @ weights, y, scale):.5f}"
+                  for x, y in ((train, train_results), (test, test_results))
+                  if len(x)]
+        print(f"{label}: log loss {' / '.join(losses)}")
+
+    report(f"current (scale {scale:.4f})", weights)
+    weights = fit_weights(train, train_results, weights, scale, epochs,
+                          rate=rate, seed=seed)
+    report("tuned", weights)
+    tuned = {**current.weights, **dict(zip(names, weights.tolist()))}
+    return Evaluator(normalise(tuned), patterns)
+
+
+def normalise(weights: dict[str, float]) -> dict[str, float]:
+    """
+    Weights scaled so that the largest is 1 in magnitude, which keeps them
+    representable at the evaluator's `SCORE_SCALE` (only their ratios matter
+    to the search; the overall scale is refitted by each tuning run).
+    Weights too small to matter beside the largest become zero.
+    """
+    largest = max(map(abs, weights.values()), default=0)
+    if not largest:
+        return weights
+    normalised = {}
+    for name, weight in weights.items():
+        weight /= largest
+        if weight and not round(weight * SCORE_SCALE):
+            print(f"dropping {name} (weight {weight:.2e} of the largest)")
+            weight = 0.0
+        normalised[name] = weight
+    return normalised
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Tune the evaluation weights to game results.")
+    parser.add_argument("games", nargs="+")
+    parser.add_argument("--features", nargs="+", choices=FEATURES,
+                        default=list(FEATURES))
+    parser.add_argument("--epochs", type=int, default=EPOCHS)
+    parser.add_argument("--rate", type=float, default=LEARNING_RATE)
+    parser.add_argument("--holdout", type=float, default=HOLDOUT)
+    parser.add_argument("--output", type=Path, default=WEIGHTS_FILE)
+    args = parser.parse_args()
+    games = [game for path in args.games for game in read_games(path)]
+    print(f"read {len(games)} games")
+    evaluator = tune(games, args.features, args.epochs, args.rate,
+                     args.holdout)
+    for name, weight in evaluator.weights.items():
+        print(f"  {name:10} {weight:8.4f}")
+    evaluator.save(args.output)
+    print(f"wrote {args.output}")
@@ -117,6 +117,12 @@ def main(options: Namespace|None=None):
 
         if options.run_server:
             server = RemoteServer(log_stream=sl)
+            remote_game = RemoteGame(
+                server,
+                [agents[p]["name"] for p in agents.keys()],
+                [],
+                lockstep=options.lockstep,
+            )
 
         async def _run_server():
             if options.run_server:
@@ -133,14 +139,10 @@ def main(options: Namespace|None=None):
                     if options.verbosity >= 2 else None,
                 game_delay(options.wait) if options.wait > 0 else None,
                 game_user_wait(rl) if options.wait < 0 else None,
-                RemoteGame(
-                    server,
-                    [agents[p]["name"] for p in agents.keys()],
-                    []
-                ).event_handler() if options.run_server else None,
+                remote_game.event_handler() if options.run_server else None,
             ]
 
-            if options.run_server:
+            if options.run_server and options.lockstep:
                 await server.wait_for_client()
 
             result = await run_game(
@@ -149,6 +151,7 @@ def main(options: Namespace|None=None):
             )
 
             if options.run_server:
+                await remote_game.close()
                 await server.stop()
 
             return result
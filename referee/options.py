@@ -202,6 +202,15 @@ def get_options():
         action="store_true",
         help="run a server for remote game clients to connect to.",
     )
+    optionals.add_argument(
+        "-L",
+        "--lockstep",
+        action="store_true",
+        help="with --run-server, wait for a client to connect, then for it to "
+        "acknowledge each game update before the game continues (default: "
+        "updates are buffered, late clients are sent a snapshot, and the "
+        "game never waits on clients).",
+    )
 
     args = parser.parse_args()
     # post-processing to combine mutually exclusive options
@@ -0,0 +1,255 @@
+# COMP30024 Artificial Intelligence, Semester 1 2025
+# Project Part B: Game Playing Agent
+
+import asyncio
+import json
+from collections import deque
+from dataclasses import dataclass
+from functools import reduce
+from typing import Any, Callable
+
+import websockets
+
+from ..log import LogStream, NullLogger
+from .serialization import coalesce_board_updates
+
+
+SEND_BUFFER_SIZE = 64   # Frames queued per client before coalescing
+SEND_BUFFER_LIMIT = 256 # Frames queued per client before disconnecting it
+ACK_WINDOW = 8          # Frames sent ahead of a client's acks
+ACK_TIMEOUT = 10.0      # Seconds to wait for an ack before disconnecting
+
+ALL_GAMES = "*"
+
+_BOARD_UPDATE_TYPE = "GameUpdate:BoardUpdate"
+_DROPPABLE_TYPES = {"GameUpdate:TurnBegin"}
+_SLOW_CONSUMER_CLOSE_CODE = 1013 # "Try again later"
+
+
+class InvalidAckError(Exception):
+    pass
+
+
+@dataclass(frozen=True, eq=False)
+class Frame:
+    """
+    An outgoing message, serialized exactly once no matter how many clients
+    it is sent to.
+    """
+    type: str
+    game_id: str | None
+    message: dict
+    payload: bytes
+
+    @property
+    def id(self) -> Any:
+        return self.message.get("id")
+
+    @classmethod
+    def encode(
+        cls,
+        message: dict,
+        id: Any = None,
+        game_id: str | None = None,
+    ) -> 'Frame':
+        message = {**message, "id": id}
+        if game_id is not None:
+            message["game"] = game_id
+        return cls(
+            message["type"],
+            game_id,
+            message,
+            json.dumps(message).encode("utf-8"),
+        )
+
+
+class ClientConnection:
+    """
+    A connected client with its own send buffer. Frames are pushed without
+    blocking the caller and written by a per-client task, which keeps at most
+    `ack_window` frames awaiting acknowledgement. A client that falls behind
+    first has its pending board updates coalesced, and is disconnected if its
+    buffer still overflows or it stops acknowledging frames altogether, so one
+    slow client never stalls the others.
+    """
+    def __init__(
+        self,
+        websocket,
+        log: LogStream | None = None,
+        buffer_size: int = SEND_BUFFER_SIZE,
+        buffer_limit: int = SEND_BUFFER_LIMIT,
+        ack_window: int = ACK_WINDOW,
+        ack_timeout: float = ACK_TIMEOUT,
+    ):
+        self._websocket = websocket
+        self._log = log or NullLogger()
+        self._buffer_size = buffer_size
+        self._buffer_limit = buffer_limit
+        self._ack_window = ack_window
+        self._ack_timeout = ack_timeout
+        self._ack_deadline: float | None = None
+
+        self._subscriptions: set[str] = {ALL_GAMES}
+        self._pending: deque[Frame] = deque()
+        self._in_flight: deque[Frame] = deque()
+        self._changed = asyncio.Event()
+        self._closed = False
+        self._close_reason: tuple[int, str] | None = None
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def subscribed(self, game_id: str | None) -> bool:
+        return game_id is None or ALL_GAMES in self._subscriptions \
+            or game_id in self._subscriptions
+
+    def subscribe(self, game_id: str):
+        """
+        Subscribe to a game. The first explicit subscription replaces the
+        default subscription to all games.
+        """
+        self._subscriptions.discard(ALL_GAMES)
+        self._subscriptions.add(game_id)
+
+    def unsubscribe(self, game_id: str):
+        self._subscriptions.discard(game_id)
+
+    def push(self, frame: Frame):
+        """
+        Queue a frame to be sent to the client.
+        """
+        if self._closed:
+            return
+
+        if len(self._pending) >= self._buffer_size \
+                and frame.type == _BOARD_UPDATE_TYPE:
+            frame = self._coalesce_pending(frame)
+
+        if len(self._pending) >= self._buffer_limit:
+            self._log.warning(
+                f"disconnecting slow client {self._websocket.remote_address}")
+            self.close(_SLOW_CONSUMER_CLOSE_CODE, "slow consumer")
+            return
+
+        self._pending.append(frame)
+        self._notify()
+
+    def on_ack(self, message: dict):
+        """
+        Handle an acknowledgement of the oldest frame in flight.
+        """
+        if not self._in_flight:
+            raise InvalidAckError(f"unexpected ack, got {message}")
+        frame = self._in_flight.popleft()
+        if frame.id != message.get("id"):
+            raise InvalidAckError(
+                f"expected ack ID {frame.id}, got {message}")
+        self._ack_deadline = self._next_ack_deadline()
+        self._notify()
+
+    async def wait_acked(self, frame: Frame):
+        """
+        Wait until a frame has been acknowledged (or will never be).
+        """
+        await self._wait_until(lambda: self._closed or (
+            frame not in self._pending and frame not in self._in_flight))
+
+    async def drain(self):
+        """
+        Wait until every queued frame has been sent and acknowledged.
+        """
+        await self._wait_until(lambda: self._closed or (
+            not self._pending and not self._in_flight))
+
+    async def run(self):
+        """
+        Write queued frames to the client until the connection is closed,
+        then close the websocket if `close` asked for it.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                timeout = None
+                if self._ack_deadline is not None:
+                    timeout = max(0, self._ack_deadline - loop.time())
+                try:
+                    await asyncio.wait_for(self._wait_until(
+                        lambda: self._closed or (self._pending and
+                            len(self._in_flight) < self._ack_window)
+                    ), timeout)
+                except asyncio.TimeoutError:
+                    if self._ack_deadline is not None \
+                            and loop.time() >= self._ack_deadline:
+                        self._log.warning(f"disconnecting unresponsive "
+                            f"client {self._websocket.remote_address}")
+                        self.close(_SLOW_CONSUMER_CLOSE_CODE, "ack timeout")
+                        break
+                    continue
+
+                if self._closed:
+                    break
+
+                frame = self._pending.popleft()
+                self._in_flight.append(frame)
+                if self._ack_deadline is None:
+                    self._ack_deadline = self._next_ack_deadline()
+                await self._websocket.send(frame.payload, text=True)
+
+        except websockets.ConnectionClosed:
+            pass
+
+        finally:
+            self._closed = True
+            self._notify()
+            if self._close_reason is not None:
+                await self._websocket.close(*self._close_reason)
+
+    def close(self, code: int = 1000, reason: str = ""):
+        """
+        Stop sending to the client. The websocket itself is closed (with the
+        given code and reason) by `run` as it finishes.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._close_reason = (code, reason)
+        self._pending.clear()
+        self._notify()
+
+    def _coalesce_pending(self, frame: Frame) -> Frame:
+        """
+        Fold every pending board update of the frame's game into it, dropping
+        pending messages of that game which it supersedes.
+        """
+        board_updates = []
+        kept = deque()
+        for pending in self._pending:
+            if pending.game_id != frame.game_id:
+                kept.append(pending)
+            elif pending.type == _BOARD_UPDATE_TYPE:
+                board_updates.append(pending.message)
+            elif pending.type not in _DROPPABLE_TYPES:
+                kept.append(pending)
+
+        self._pending = kept
+        if not board_updates:
+            return frame
+
+        self._log.debug("client behind, coalescing board updates")
+        message = reduce(coalesce_board_updates,
+            [*board_updates, frame.message])
+        return Frame.encode(message, frame.id, frame.game_id)
+
+    def _next_ack_deadline(self) -> float | None:
+        if not self._in_flight:
+            return None
+        return asyncio.get_running_loop().time() + self._ack_timeout
+
+    def _notify(self):
+        self._changed.set()
+
+    async def _wait_until(self, predicate: Callable[[], Any]):
+        while not predicate():
+            self._changed.clear()
+            await self._changed.wait()
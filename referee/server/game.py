@@ -7,23 +7,44 @@ from time import time
 from typing import AsyncGenerator
 
 from .server import RemoteServer
-from .serialization import serialize_game_update
+from .serialization import serialize_game_update, BoardDeltaEncoder, \
+    coalesce_board_updates
 from ..game import GameUpdate, PlayerColor, GameBegin, GameEnd
 
+CLOSE_FLUSH_TIMEOUT = 0.5   # Seconds to let clients catch up on close,
+                            # unless in lockstep mode
+
 
 class RemoteGame:
     """
     A remote game instance that can sync updates with a client.
+
+    Updates are published to the server without waiting on any client (each
+    connected client has its own send buffer), unless lockstep mode is
+    requested, in which case every update must be acknowledged by all clients
+    watching the game before the game continues.
+
+    Updates since the last full board checkpoint are kept in memory, so that
+    clients joining (or rejoining) mid-game can be caught up with a single
+    snapshot message rather than a replay.
     """
     def __init__(
             self, 
             server: RemoteServer,
             player_names: list[str],
-            game_log_lines: list[str]
+            game_log_lines: list[str],
+            lockstep: bool = False,
+            game_id: str = "0",
         ):
         self._server = server
         self._player_names = player_names
-        self._history = []
+        self._history: list[dict] = []
+        self._board_encoder = BoardDeltaEncoder()
+        self._lockstep = lockstep
+        self._game_id = game_id
+        self._next_id = 0
+
+        self._server.register_game(game_id, player_names, self.snapshot)
 
     async def event_handler(self) -> AsyncGenerator:
         """
@@ -35,17 +56,17 @@ class RemoteGame:
 
             match update:
                 case GameBegin(board):
-                    self._history.clear()
                     self._server._log.debug("syncing game metadata...")
                     await self.sync_game_metadata()
 
             try:
-                serialized_update = serialize_game_update(update)
+                serialized_update = serialize_game_update(
+                    update, self._board_encoder)
         
-                await self._server.sync(serialized_update, len(self._history))
+                await self._broadcast(serialized_update)
 
                 self._server._log.debug(f"broadcasted game update: {serialized_update}")
-                self._history.append(update)
+                self._record(serialized_update)
                 
             except Exception as e:
                 self._server._log.error(f"error broadcasting game update: {e}")
@@ -59,5 +80,75 @@ class RemoteGame:
             "type": "GameMetadata",
             "players": self._player_names,
         }
-        await self._server.sync(message)
+        await self._broadcast(message)
         self._server._log.debug(f"sent game metadata: {message}")
+
+    def snapshot(self) -> dict:
+        """
+        Build a catch-up message for a client joining mid-game: the current
+        board, plus the actions played since the last board checkpoint.
+        """
+        message = {
+            "type": "GameSnapshot",
+            "players": self._player_names,
+            "actions": [],
+        }
+        board = None
+        for update in self._history:
+            match update["type"]:
+                case "GameUpdate:GameBegin" | "GameUpdate:BoardUpdate":
+                    board = update if board is None \
+                        else coalesce_board_updates(board, update)
+                case "GameUpdate:TurnBegin":
+                    message["turnId"] = update["turnId"]
+                    message["player"] = update["player"]
+                case "GameUpdate:TurnEnd":
+                    message["actions"].append({
+                        "turnId": update["turnId"],
+                        "player": update["player"],
+                        "action": update["action"],
+                    })
+                case "GameUpdate:GameEnd":
+                    message["winner"] = update["winner"]
+
+        if board is not None:
+            message["seq"] = board["seq"]
+            message["board"] = board["board"]
+        return message
+
+    def _record(self, update: dict):
+        # Full board snapshots are checkpoints, so anything older is redundant
+        if "board" in update:
+            self._history.clear()
+        self._history.append(update)
+
+    async def flush(self):
+        """
+        Wait until the client(s) have acknowledged every update sent so far.
+        """
+        await self._server.flush(self._game_id)
+
+    async def close(self):
+        """
+        Flush any buffered updates and remove the game from the server. Only
+        in lockstep mode is every client waited on until it has acknowledged
+        them all; otherwise clients get at most `CLOSE_FLUSH_TIMEOUT` seconds,
+        so that a stalled one cannot hold up the end of the game.
+        """
+        try:
+            if self._lockstep:
+                await self.flush()
+            else:
+                await asyncio.wait_for(self.flush(), CLOSE_FLUSH_TIMEOUT)
+        except asyncio.TimeoutError:
+            self._server._log.debug("clients still behind on close")
+        finally:
+            self._server.unregister_game(self._game_id)
+
+    async def _broadcast(self, message: dict):
+        id = self._next_id
+        self._next_id += 1
+        if self._lockstep:
+            await self._server.sync(message, id, self._game_id)
+        else:
+            self._server.publish(message, id, self._game_id)
@@ -5,7 +5,17 @@ from dataclasses import asdict
 from typing import Literal
 
 from ..game import *
-from ..game.board import CellState
+from ..game.board import CellState, BoardMutation
+
+
+BOARD_RESYNC_INTERVAL = 25 # Board updates between full board snapshots
+
+_CELL_STATE_VALUES = {
+    PlayerColor.RED: 1,
+    PlayerColor.BLUE: -1,
+    'LilyPad': 2,
+    None: 0,
+}
 
 
 def serialize_game_board(board: Board) -> list[list[int]]:
@@ -13,9 +23,8 @@ def serialize_game_board(board: Board) -> list[list[int]]:
     Serialize a game board to a dictionary.
     """
     sz_board = [BOARD_N * [0] for _ in range(BOARD_N)]
-    for r in range(BOARD_N):
-        for c in range(BOARD_N):
-            sz_board[r][c] = serialize_game_board_cell(board[Coord(r, c)])
+    for coord, cell in board._state.items():
+        sz_board[coord.r][coord.c] = serialize_game_board_cell(cell)
 
     return sz_board
 
@@ -24,17 +33,99 @@ def serialize_game_board_cell(cell: CellState) -> int:
     """
     Serialize a game board cell to a dictionary.
     """
-    match cell.state:
-        case PlayerColor.RED:
-            return 1
-        case PlayerColor.BLUE:
-            return -1
-        case 'LilyPad':
-            return 2
-        case None:
-            return 0
-        case _:
-            raise ValueError(f"Invalid cell state: {cell}")
+    try:
+        return _CELL_STATE_VALUES[cell.state]
+    except KeyError:
+        raise ValueError(f"Invalid cell state: {cell}")
+
+
+def serialize_board_mutation(mutation: BoardMutation) -> list[list[int]]:
+    """
+    Serialize the cells changed by a board mutation as [r, c, state] triples.
+    """
+    return [
+        [m.cell.r, m.cell.c, serialize_game_board_cell(m.next)]
+        for m in sorted(mutation.cell_mutations, key=lambda m: m.cell)
+    ]
+
+
+class BoardDeltaEncoder:
+    """
+    Stateful board serializer which sends a full board snapshot once, then
+    only the cells changed by each subsequent action. Every encoded board
+    carries a sequence number so clients can detect a missed update, and a
+    full snapshot is resent periodically (or whenever the encoder cannot
+    account for every action since the last board it sent).
+    """
+    def __init__(self, resync_interval: int = BOARD_RESYNC_INTERVAL):
+        self._resync_interval = resync_interval
+        self.reset()
+
+    def reset(self):
+        self._seq = 0
+        self._turn_count: int | None = None
+        self._since_snapshot = 0
+
+    def snapshot(self, board: Board) -> dict:
+        """
+        Serialize the full board, resetting the delta chain.
+        """
+        self._turn_count = board.turn_count
+        self._since_snapshot = 0
+        return {
+            "seq": self._next_seq(),
+            "board": serialize_game_board(board),
+        }
+
+    def encode(self, board: Board) -> dict:
+        """
+        Serialize the board as a delta against the previously encoded board,
+        falling back to a full snapshot when a resync is due.
+        """
+        if self._turn_count is None \
+                or board.turn_count != self._turn_count + 1 \
+                or self._since_snapshot + 1 >= self._resync_interval:
+            return self.snapshot(board)
+
+        self._turn_count = board.turn_count
+        self._since_snapshot += 1
+        seq = self._next_seq()
+        return {
+            "seq": seq,
+            "baseSeq": seq - 1,
+            "cells": serialize_board_mutation(board._history[-1]),
+        }
+
+    def _next_seq(self) -> int:
+        seq = self._seq
+        self._seq += 1
+        return seq
+
+
+def coalesce_board_updates(prev: dict, next: dict) -> dict:
+    """
+    Merge two serialized board updates (as produced by `BoardDeltaEncoder`)
+    into a single update with the same effect as applying both in order.
+    """
+    if "board" in next:
+        return next
+
+    if "board" in prev:
+        board = [row.copy() for row in prev["board"]]
+        for r, c, state in next["cells"]:
+            board[r][c] = state
+        snapshot = {
+            k: v for k, v in next.items() if k not in ("cells", "baseSeq")
+        }
+        return {**snapshot, "board": board}
+
+    cells = {(r, c): state for r, c, state in prev["cells"]}
+    cells.update({(r, c): state for r, c, state in next["cells"]})
+    return {
+        **next,
+        "baseSeq": prev["baseSeq"],
+        "cells": [[r, c, state] for (r, c), state in sorted(cells.items())],
+    }
 
 
 def serialize_game_player(player: Player | PlayerColor | None) -> int:
@@ -53,7 +144,7 @@ def serialize_game_action(action: Action) -> dict:
     """
     match action:
         case MoveAction(coord, directions):
-            if type(directions) != tuple:
+            if isinstance(directions, Direction):
                 directions = (directions,)
             return {
                 "type": "MoveAction",
@@ -67,9 +158,13 @@ def serialize_game_action(action: Action) -> dict:
             }
 
 
-def serialize_game_update(update: GameUpdate) -> dict:
+def serialize_game_update(
+    update: GameUpdate,
+    board_encoder: BoardDeltaEncoder | None = None,
+) -> dict:
     """
-    Serialize a game update to a dictionary.
+    Serialize a game update to a dictionary. If a board encoder is given,
+    board updates are delta-encoded against the previously sent board.
     """
     update_cls_name = update.__class__.__name__
     update_payload = {}
@@ -81,9 +176,13 @@ def serialize_game_update(update: GameUpdate) -> dict:
             }
 
         case GameBegin(board):
-            update_payload = {
-                "board": serialize_game_board(board),
-            }
+            if board_encoder is not None:
+                board_encoder.reset()
+                update_payload = board_encoder.snapshot(board)
+            else:
+                update_payload = {
+                    "board": serialize_game_board(board),
+                }
 
         case TurnBegin(turn_id, player):
             update_payload = {
@@ -99,9 +198,12 @@ def serialize_game_update(update: GameUpdate) -> dict:
             }
 
         case BoardUpdate(board):
-            update_payload = {
-                "board": serialize_game_board(board),
-            }
+            if board_encoder is not None:
+                update_payload = board_encoder.encode(board)
+            else:
+                update_payload = {
+                    "board": serialize_game_board(board),
+                }
 
         case GameEnd(winner):
             update_payload = {
@@ -1,26 +1,31 @@
 # COMP30024 Artificial Intelligence, Semester 1 2025
 # Project Part B: Game Playing Agent
 
-from collections import Counter
+from collections import Counter, defaultdict, deque
 from math import inf
+from typing import Callable
 import json
 import asyncio
 import websockets
 
 from ..log import LogStream, NullLogger
 from .message import Message
+from .connection import ClientConnection, Frame, InvalidAckError
 
 
-INCOMING_POLL_INTERVAL = 0.1
 LISTEN_HOST = "0.0.0.0" # For use within dev container
 LISTEN_PORT = 8765
 
 
-class InvalidAckError(Exception):
-    pass
-
-
 class RemoteServer:
+    """
+    A websocket server which broadcasts one or more concurrent games to any
+    number of connected clients (spectators). Clients receive every game by
+    default, or can send `{"type": "Subscribe", "game": <id>}` (and
+    "Unsubscribe") to follow specific games, and "ListGames" to discover them.
+    On connecting or subscribing, a client is sent a snapshot of each game it
+    follows, so games never need to wait for clients to join.
+    """
     def __init__(self, 
             host: str=LISTEN_HOST, 
             port: int=LISTEN_PORT,
@@ -31,40 +36,114 @@ class RemoteServer:
         self._log = log_stream or NullLogger()
 
         self._server = None
-        self._incoming_messages: list[Message] = []
+        self._future = None
+
+        # Incoming messages are queued per message type, in arrival order.
+        # Every message is also tagged with a global sequence number so that
+        # untyped receives can still take the oldest message overall.
+        self._incoming_messages: defaultdict[str, deque[tuple[int, Message]]] \
+            = defaultdict(deque)
+        self._incoming_seq = 0
+        self._incoming_cond = asyncio.Condition()
+
+        self._connections: dict[object, ClientConnection] = {}
+        self._games: dict[str, dict] = {}
+        self._game_snapshots: dict[str, Callable[[], dict]] = {}
+        self._server_started = asyncio.Event()
+        self._client_connected = asyncio.Event()
     
-    async def send(self, message: dict, id: int | None = None):
+    def register_game(
+        self,
+        game_id: str,
+        player_names: list[str],
+        snapshot: Callable[[], dict] | None = None,
+    ):
         """
-        Send a message to the client.
+        Make a game known to clients (see "ListGames"). If given, `snapshot`
+        is called to build the catch-up message for clients that join late.
         """
-        assert self._server, "Server not running."
+        self._games[game_id] = {
+            "game": game_id,
+            "players": player_names,
+        }
+        if snapshot is not None:
+            self._game_snapshots[game_id] = snapshot
 
-        message_str = json.dumps({
-            **message,
-            "id": id,
-        })
-        self._log.debug(f"sending message: {message_str}")
+    def unregister_game(self, game_id: str):
+        self._games.pop(game_id, None)
+        self._game_snapshots.pop(game_id, None)
+
+    def _catch_up(self, client: ClientConnection, game_id: str | None = None):
+        """
+        Send a client the current snapshot of one (or every) game it follows.
+        """
+        for snapshot_game_id, snapshot in self._game_snapshots.items():
+            if game_id is not None and snapshot_game_id != game_id:
+                continue
+            if client.subscribed(snapshot_game_id):
+                client.push(Frame.encode(snapshot(), None, snapshot_game_id))
+
+    def publish(
+        self,
+        message: dict,
+        id: int | None = None,
+        game_id: str | None = None,
+    ) -> Frame:
+        """
+        Serialize a message once and queue it for every client subscribed to
+        the given game (or all clients if no game is given). Never blocks.
+        """
+        frame = Frame.encode(message, id, game_id)
+        self._log.debug(f"sending message: {frame.payload}")
 
         if self._server is None:
-            self._log.warning("attempted to send message when server not running.")
-            return
-        
-        for conn in self._server.connections:
-            await conn.send(message_str)
-            self._log.debug(f"sent message: {message_str}")
+            # Clients that connect later will be caught up with a snapshot
+            self._log.debug("server not running, message not sent.")
+            return frame
 
-    async def sync(self, message: dict, expect_id: str | None = None):
+        for client in self._subscribers(game_id):
+            client.push(frame)
+        return frame
+
+    async def send(
+        self,
+        message: dict,
+        id: int | None = None,
+        game_id: str | None = None,
+    ):
+        """
+        Send a message to the client(s).
+        """
+        assert self._server, "Server not running."
+        self.publish(message, id, game_id)
+
+    async def sync(
+        self,
+        message: dict,
+        expect_id: int | None = None,
+        game_id: str | None = None,
+    ):
         """
-        Send a message to the client and wait for a response.
+        Send a message to the client(s) and wait for each to acknowledge it.
         """
-        await self.send(message, expect_id)
+        subscribers = self._subscribers(game_id)
+        frame = self.publish(message, expect_id, game_id)
         self._log.debug("waiting for <ack>...")
-        response = await self.receive('<ack>')
-        if expect_id and response and expect_id != response.get("id"):
-            await self.stop()
-            raise InvalidAckError(f"expected ack ID {expect_id}, got {response}")
+        await asyncio.gather(*(c.wait_acked(frame) for c in subscribers))
         self._log.debug("received <ack>")
 
+    async def flush(self, game_id: str | None = None):
+        """
+        Wait until the client(s) have acknowledged every message sent so far.
+        """
+        await asyncio.gather(*(c.drain() for c in self._subscribers(game_id)))
+
+    def _subscribers(self, game_id: str | None) -> list[ClientConnection]:
+        return [
+            client for client in self._connections.values()
+            if not client.closed and client.subscribed(game_id)
+        ]
+
     async def receive(
         self, 
         message_type: str | None = None,
@@ -72,22 +151,64 @@ class RemoteServer:
         """
         Take the next message from the queue of the specified type and return
         it. Waits until a message of the specified type is available if none.
+        Returns None if there are (or become) no connected clients.
         """
-        while self._server and len(self._server.connections) > 0:
-            if message_type is not None:
-                for i, message in enumerate(self._incoming_messages):
-                    if message.type == message_type:
-                        return self._incoming_messages.pop(i).message
-            else:
-                if self._incoming_messages:
-                    return self._incoming_messages.pop(0).message
+        async with self._incoming_cond:
+            await self._incoming_cond.wait_for(
+                lambda: not self._connections or
+                    self._has_message(message_type)
+            )
+            if not self._has_message(message_type):
+                return None
+            return self._pop_message(message_type).message
 
-            await asyncio.sleep(INCOMING_POLL_INTERVAL)
+    def _has_message(self, message_type: str | None) -> bool:
+        if message_type is not None:
+            return len(self._incoming_messages[message_type]) > 0
+        return any(self._incoming_messages.values())
+
+    def _pop_message(self, message_type: str | None) -> Message:
+        if message_type is None:
+            # Oldest message across all types
+            queue = min(
+                (q for q in self._incoming_messages.values() if q),
+                key=lambda q: q[0][0]
+            )
+        else:
+            queue = self._incoming_messages[message_type]
+        _, message = queue.popleft()
+        return message
+
+    async def _notify_incoming(self):
+        async with self._incoming_cond:
+            self._incoming_cond.notify_all()
 
     async def _handler(self, websocket):
         """
         Handle incoming then outgoing messages.
         """
+        client = ClientConnection(websocket, self._log)
+        writer = asyncio.create_task(client.run())
+        self._connections[websocket] = client
+        self._client_connected.set()
+        self._catch_up(client)
+        try:
+            await self._handle_messages(client, websocket)
+        except InvalidAckError as e:
+            self._log.error(f"invalid ack, disconnecting client: {e}")
+        except websockets.ConnectionClosed:
+            pass    # Including our own close of a slow client
+        finally:
+            client.close()
+            del self._connections[websocket]
+            if not self._connections:
+                self._client_connected.clear()
+            # Wake any receivers so they can observe the disconnection
+            await self._notify_incoming()
+            # The writer closes the websocket as it finishes
+            await writer
+
+    async def _handle_messages(self, client: ClientConnection, websocket):
         async for message in websocket:
             self._log.debug(f"received message: {message}")
             
@@ -101,7 +222,27 @@ class RemoteServer:
                 self._log.error(f"missing message type: {e}")
                 return
 
-            self._incoming_messages.append(Message(message_type, message))
+            match message_type:
+                case "<ack>":
+                    client.on_ack(message)
+                case "Subscribe":
+                    game_id = str(message.get("game"))
+                    client.subscribe(game_id)
+                    self._catch_up(client, game_id)
+                case "Unsubscribe":
+                    client.unsubscribe(str(message.get("game")))
+                case "ListGames":
+                    client.push(Frame.encode({
+                        "type": "GameList",
+                        "games": list(self._games.values()),
+                    }))
+                case _:
+                    async with self._incoming_cond:
+                        self._incoming_messages[message_type].append(
+                            (self._incoming_seq,
+                             Message(message_type, message)))
+                        self._incoming_seq += 1
+                        self._incoming_cond.notify_all()
 
     async def run(self):
         """
@@ -111,6 +252,7 @@ class RemoteServer:
             self._log.info(f"server listening on ws://{self._host}:{self._port}...")
             self._server = server
             self._future = asyncio.Future()
+            self._server_started.set()
             try:
                 await self._future
             except asyncio.CancelledError:
@@ -129,13 +271,11 @@ class RemoteServer:
         """
         Wait for a client to connect.
         """
-        while self._server is None:
-            await asyncio.sleep(INCOMING_POLL_INTERVAL)
+        await self._server_started.wait()
 
         self._log.info("waiting for client to connect...")
 
-        while len(list(self._server.connections)) == 0:
-            await asyncio.sleep(INCOMING_POLL_INTERVAL)
+        await self._client_connected.wait()
 
         await self.sync({"type": "<ping>"})
 